@@ -0,0 +1,273 @@
+# coding=utf-8
+"""Mesures de performances de graph.py et sapin.py.
+
+On lance les mesures directement depuis le répertoire de graph.py :
+$ python3 bench.py [resultats.json]
+Sans serveur graphique (variable DISPLAY absente), les fenêtres sont ouvertes
+hors écran. Les résultats sont résumés à l'écran et enregistrés au format
+JSON (par défaut dans bench.json), pour pouvoir comparer deux versions.
+
+Mesures disponibles :
+- demarrage : temps d'import du module graph, et temps jusqu'à l'affichage
+  de la première image (import + ouverture de la fenêtre + premier refresh).
+  Chaque mesure est faite dans un nouvel interpréteur python, pour ne pas
+  profiter des modules déjà importés.
+- formes : débit de sapin.py pour chaque forme et chaque taille, en mémoire
+  (lignes/s avec lignes) et en écriture (octets/s avec ecrit, cache vidé ou
+  non), et pic de mémoire allouée.
+- dessin : débit de graph.py pour chaque taille de fenêtre : plot (pixels/s),
+  plot_many, remplit_carre sans tampon (objets/s), affiche_matrice complet
+  et incrémental, latence de l'affichage après un pixel et après toute la
+  fenêtre, et pic de mémoire allouée. Hors écran, refresh() n'envoie rien :
+  la latence mesurée est alors celle du dessin de l'image en mémoire (comme
+  pour exporte), ce qu'indique "latence_rendu".
+Les durées sont des médianes, en secondes.
+"""
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import graph
+import sapin
+
+
+REPERTOIRE = os.path.dirname(os.path.abspath(__file__))
+
+# programme lancé dans un nouvel interpréteur pour mesurer le démarrage
+_PROGRAMME_DEMARRAGE = """
+import time
+t0 = time.perf_counter()
+import graph
+t1 = time.perf_counter()
+graph.ouvre_fenetre(600, 800, hors_ecran={hors_ecran})
+graph.plot(0, 0)
+graph.refresh()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t0)
+"""
+
+
+def demarrage(repetitions=10, hors_ecran=True):
+    """Mesure le démarrage de graph.py.
+
+    - repetitions (int): nombre de mesures (défaut: 10)
+    - hors_ecran (bool): ouvrir la fenêtre hors écran (défaut: True)
+    Renvoie un dictionnaire contenant les médianes (en secondes) du temps
+    d'import ("import") et du temps jusqu'à la première image
+    ("premiere_image").
+    """
+    programme = _PROGRAMME_DEMARRAGE.format(hors_ecran=hors_ecran)
+    imports, premieres = [], []
+    for k in range(repetitions):
+        sortie = subprocess.run([sys.executable, "-c", programme],
+                                cwd=REPERTOIRE, check=True,
+                                capture_output=True, text=True).stdout
+        t_import, t_premiere = map(float, sortie.split())
+        imports.append(t_import)
+        premieres.append(t_premiere)
+    return {"import": statistics.median(imports),
+            "premiere_image": statistics.median(premieres)}
+
+
+def _chrono(fonction, repetitions):
+    """interne: Médiane de la durée (en secondes) de fonction()."""
+    durees = []
+    for k in range(repetitions):
+        t0 = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - t0)
+    return statistics.median(durees)
+
+
+def _pic_memoire(fonction):
+    """interne: Pic de mémoire allouée (en octets) pendant fonction()."""
+    tracemalloc.start()
+    try:
+        fonction()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def formes(tailles=(10, 100, 1000), repetitions=5):
+    """Mesure la génération des formes de sapin.py.
+
+    - tailles (séquence d'entiers): tailles n des formes (défaut: 10, 100
+      et 1000)
+    - repetitions (int): nombre de mesures de chaque durée (défaut: 5)
+    Renvoie une liste de dictionnaires, un par forme et par taille.
+    """
+    resultats = []
+    sortie = os.open(os.devnull, os.O_WRONLY)
+    try:
+        for forme in ("colonne", "diagonale1", "diagonale2", "sapin"):
+            for n in tailles:
+                rangs = sapin.lignes(forme, n)
+                octets = sum(len(r) + 1 for r in rangs)
+
+                def froid():
+                    sapin.dimensionne_cache()
+                    sapin.ecrit(forme, n, sortie)
+                t_lignes = _chrono(lambda: sapin.lignes(forme, n),
+                                   repetitions)
+                t_froid = _chrono(froid, repetitions)
+                t_chaud = _chrono(lambda: sapin.ecrit(forme, n, sortie),
+                                  repetitions)
+                resultats.append({
+                    "forme": forme, "n": n,
+                    "lignes": len(rangs), "octets": octets,
+                    "lignes_par_s": len(rangs) / t_lignes,
+                    "ecriture_octets_par_s": octets / t_froid,
+                    "ecriture_cache_octets_par_s": octets / t_chaud,
+                    "pic_memoire_lignes": _pic_memoire(
+                        lambda: sapin.lignes(forme, n)),
+                    "pic_memoire_ecriture": _pic_memoire(froid)})
+    finally:
+        os.close(sortie)
+        sapin.dimensionne_cache()
+    return resultats
+
+
+def _fenetre(taille, pixels=1, tampon=True, hors_ecran=True):
+    """interne: Ouvre une fenêtre de mesure (sans axes), déjà affichée."""
+    g = graph.fenetre(taille, pixels, axes=False, tampon=tampon,
+                      hors_ecran=hors_ecran)
+    g.refresh()
+    return g
+
+
+def _affiche(g):
+    """interne: Affiche la fenêtre g : refresh, puis dessin hors écran."""
+    g.refresh()
+    if g.hors_ecran:
+        g._image_rgb()
+
+
+def _fonctions_module(g, fonction):
+    """interne: Appelle fonction() avec g comme fenêtre des fonctions du
+    module graph (plot, plot_many...)."""
+    graph.fengra = g
+    try:
+        return fonction()
+    finally:
+        graph.fengra = None
+
+
+def dessin(tailles=(100, 300, 1000), repetitions=5, hors_ecran=True):
+    """Mesure les fonctions de dessin de graph.py.
+
+    - tailles (séquence d'entiers): côtés n des fenêtres de n x n pixels
+      (défaut: 100, 300 et 1000) ; affiche_matrice est mesuré sur une
+      grille de n/10 x n/10 cases
+    - repetitions (int): nombre de mesures de chaque durée (défaut: 5)
+    - hors_ecran (bool): ouvrir les fenêtres hors écran (défaut: True)
+    Renvoie une liste de dictionnaires, un par taille.
+    """
+    resultats = []
+    for n in tailles:
+        mesure = {"n": n}
+        # pixels un par un (au plus 10^5 par mesure), puis tous d'un coup
+        g = _fenetre((n, n), hors_ecran=hors_ecran)
+        cases = [(k // n, k % n) for k in range(min(n*n, 100000))]
+        t = _fonctions_module(g, lambda: _chrono(
+            lambda: [graph.plot(i, j) for i, j in cases], repetitions))
+        mesure["plot_pixels_par_s"] = len(cases) / t
+        lignes = [i for i in range(n) for j in range(n)]
+        colonnes = list(range(n)) * n
+        t = _fonctions_module(g, lambda: _chrono(
+            lambda: graph.plot_many(lignes, colonnes, "red"), repetitions))
+        mesure["plot_many_pixels_par_s"] = n*n / t
+        mesure["pic_memoire_plot_many"] = _fonctions_module(
+            g, lambda: _pic_memoire(
+                lambda: graph.plot_many(lignes, colonnes, "red")))
+        mesure["latence_rendu"] = "image en mémoire" if hors_ecran \
+            else "écran"
+        mesure["latence_refresh_pixel"] = _chrono(
+            lambda: (g.colorie_case((n // 2, n // 2), "blue", refresh=False),
+                     _affiche(g)), max(repetitions, 20))
+        mesure["latence_refresh_complet"] = _chrono(
+            lambda: (g.remplit_carres(lignes, colonnes, "green",
+                                      refresh=False),
+                     _affiche(g)), repetitions)
+        g.ferme()
+        # un objet graphique par case (au plus 2.10^4 par mesure)
+        g = _fenetre((n, n), tampon=False, hors_ecran=hors_ecran)
+        cases = cases[:20000]
+        t = _chrono(lambda: ([g.remplit_carre(p, refresh=False)
+                              for p in cases], g.update(), g.efface()),
+                    repetitions)
+        mesure["remplit_carre_objets_par_s"] = len(cases) / t
+        g.ferme()
+        # matrice de jeu complète, puis 1% des cases modifiées
+        m = max(n // 10, 2)
+        g = _fenetre((m, m), pixels=8, tampon=False, hors_ecran=hors_ecran)
+        matrice = [[(i + j) % 2 for j in range(m)] for i in range(m)]
+        t = _chrono(lambda: g.affiche_matrice(matrice), repetitions)
+        mesure["affiche_matrice_objets_par_s"] = m*m / t
+        modifiee = [[(1 - v) if (i*m + j) % 100 == 0 else v
+                     for j, v in enumerate(ligne)]
+                    for i, ligne in enumerate(matrice)]
+        mesure["latence_affiche_matrice_incremental"] = _chrono(
+            lambda: (g.affiche_matrice(modifiee, incremental=True),
+                     g.affiche_matrice(matrice, incremental=True)),
+            repetitions) / 2
+        mesure["pic_memoire_affiche_matrice"] = _pic_memoire(
+            lambda: g.affiche_matrice(matrice))
+        g.ferme()
+        resultats.append(mesure)
+    return resultats
+
+
+def mesure_tout(repetitions=5, hors_ecran=True):
+    """Effectue toutes les mesures.
+
+    - repetitions (int): nombre de mesures de chaque durée (défaut: 5)
+    - hors_ecran (bool): ouvrir les fenêtres hors écran (défaut: True)
+    Renvoie un dictionnaire sérialisable en JSON : description de la
+    machine ("machine"), puis résultats de demarrage ("demarrage"), formes
+    ("formes") et dessin ("dessin").
+    """
+    return {
+        "machine": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "systeme": platform.platform(),
+            "processeur": platform.machine(),
+            "hors_ecran": hors_ecran},
+        "demarrage": demarrage(repetitions=2*repetitions,
+                               hors_ecran=hors_ecran),
+        "formes": formes(repetitions=repetitions),
+        "dessin": dessin(repetitions=repetitions, hors_ecran=hors_ecran)}
+
+
+if __name__ == "__main__":
+    nom_fichier = sys.argv[1] if len(sys.argv) > 1 else "bench.json"
+    hors_ecran = "DISPLAY" not in os.environ
+    resultat = mesure_tout(hors_ecran=hors_ecran)
+    with open(nom_fichier, "w") as fichier:
+        json.dump(resultat, fichier, indent=2)
+    d = resultat["demarrage"]
+    print("démarrage (%s) :" % ("hors écran" if hors_ecran else "à l'écran"))
+    print("  import de graph   : %.1f ms" % (1000*d["import"]))
+    print("  première image    : %.1f ms" % (1000*d["premiere_image"]))
+    print("formes :")
+    for f in resultat["formes"]:
+        print("  %-10s n=%-5d %12.0f lignes/s %8.1f Mo/s écrits" % (
+            f["forme"], f["n"], f["lignes_par_s"],
+            f["ecriture_octets_par_s"] / 1e6))
+    print("dessin :")
+    for f in resultat["dessin"]:
+        print("  n=%-5d plot %.2g px/s, plot_many %.2g px/s, "
+              "remplit_carre %.2g obj/s, refresh %.2f ms" % (
+                  f["n"], f["plot_pixels_par_s"],
+                  f["plot_many_pixels_par_s"],
+                  f["remplit_carre_objets_par_s"],
+                  1000*f["latence_refresh_pixel"]))
+    print("résultats enregistrés dans", nom_fichier)
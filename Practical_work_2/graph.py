@@ -5,10 +5,15 @@ Version 0.20a
 
 Ce module fournit quatre fonctions élémentaires décrites ci-dessous, pour :
 - ouvrir une fenêtre,
-- afficher un pixel dans la fenêtre,
+- afficher un pixel dans la fenêtre (ou plusieurs à la fois avec plot_many,
+  ou des segments horizontaux avec plot_segments),
 - rafraichir la fenêtre,
 - attendre sa fermeture.
 
+La fenêtre peut aussi être ouverte "hors écran" (sans tkinter ni serveur
+graphique) : les pixels sont alors dessinés en mémoire, et chaque image peut
+être enregistrée dans un fichier PNG ou PPM avec la fonction exporte().
+
 Si une précondition de ces fonctions n'est pas vérifiée, le programme
 s'arrête brutalement avec une erreur de type "AssertionError"
 
@@ -16,19 +21,43 @@ Copyright 2019-2020, Vincent Loechner <loechner@unistra.fr>
 Distribué sous licence publique WTFPL, version 2 (http://www.wtfpl.net/)
 """
 
-import tkinter as tk
-import queue
+import sys
+import time
+import functools
+import math
+import struct
+import zlib
 
 
 """fengra (global): objet de la version simplifiée de cette bibliothèque."""
 fengra = None
 
+"""tk (global): module tkinter, importé à l'ouverture de la première fenêtre
+à l'écran (les fenêtres hors écran n'en ont pas besoin)."""
+tk = None
+
+
+def _importe_tk():
+    """interne: Importe tkinter une seule fois, dans la variable globale tk."""
+    global tk
+    if tk is None:
+        import tkinter
+        tk = tkinter
+    return tk
+
 
-def ouvre_fenetre(hauteur, largeur):
+def ouvre_fenetre(hauteur, largeur, tampon=True, hors_ecran=False):
     """Ouvre une fenêtre graphique.
 
     Paramètres :
     - hauteur, largeur (entiers) : taille de la fenêtre en pixels
+    - tampon (paramètre optionnel, booléen) : si True (défaut), les pixels
+      sont stockés dans un tampon mémoire et affichés en une seule image à
+      chaque refresh(). Si False, chaque plot() crée un objet graphique
+      tkinter (beaucoup plus lent pour les grandes images).
+    - hors_ecran (paramètre optionnel, booléen) : si True, aucune fenêtre
+      n'est affichée et tkinter n'est pas utilisé : les pixels sont dessinés
+      en mémoire, et peuvent être enregistrés avec exporte() (défaut: False)
     Préconditions :
     - la fenêtre ne peut être ouverte qu'une seule fois, mais si vous la
     fermez (avec attend_fenetre() dans votre programme), vous pouvez en
@@ -38,7 +67,8 @@ def ouvre_fenetre(hauteur, largeur):
     global fengra
     assert fengra is None, "ERREUR : la fonction ouvre_fenetre() a été appelée\
  plus d'une fois dans votre programme!"
-    fengra = fenetre((hauteur, largeur), 1, axes=False)
+    fengra = fenetre((hauteur, largeur), 1, axes=False, tampon=tampon,
+                     hors_ecran=hors_ecran)
 
 
 def plot(ligne, colonne, couleur="black"):
@@ -53,15 +83,125 @@ def plot(ligne, colonne, couleur="black"):
       Cet argument est une chaîne de caractère représentant une couleur valide
       de la bibliothèque tkinter. Voir par exemple :
       http://www.science.smith.edu/dftwiki/index.php/Color_Charts_for_TKinter
-      On peut aussi spécifier un code RGB, par exemple "#FF0000" -> rouge.
+      On peut aussi spécifier un code RGB, par exemple "#FF0000" -> rouge,
+      ou un entier 0xRRGGBB (voir couleur_rgb).
     Préconditions :
+    - la couleur est valide
     - la fenêtre doit avoir été ouverte précédemment : la fonction
       ouvre_fenetre(hauteur, largeur) doit avoir été appelée
     - 0 <= ligne < hauteur
     - 0 <= colonne < largeur
     """
     assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
-    fengra.remplit_carre((ligne, colonne), couleur=couleur, refresh=False)
+    if fengra.tampon is not None:
+        fengra.colorie_case((ligne, colonne), couleur=couleur, refresh=False)
+    else:
+        fengra.remplit_carre((ligne, colonne), couleur=couleur, refresh=False)
+
+
+def plot_many(lignes, colonnes, couleurs="black"):
+    """Affiche plusieurs pixels en une seule fois.
+
+    Équivalent à plot(lignes[k], colonnes[k], couleurs[k]) pour tous les k,
+    mais beaucoup plus rapide pour un grand nombre de pixels : les
+    préconditions ne sont vérifiées qu'une fois pour tout le lot.
+    Remarque : l'affichage n'est vraiment effectué à l'écran qu'après appel
+    de la fonction refresh().
+    Paramètres :
+    - lignes, colonnes (séquences d'entiers de même longueur : listes,
+      array.array ou tableaux NumPy) : positions des pixels
+    - couleurs (paramètre optionnel) : une seule couleur tkinter pour tous
+      les pixels (défaut : le noir), ou une séquence de couleurs de même
+      longueur que lignes. Avec NumPy, on peut aussi donner un tableau
+      d'octets de forme (n, 3) contenant les composantes (rouge, vert, bleu).
+    Préconditions :
+    - la fenêtre doit avoir été ouverte précédemment : la fonction
+      ouvre_fenetre(hauteur, largeur) doit avoir été appelée
+    - 0 <= lignes[k] < hauteur et 0 <= colonnes[k] < largeur pour tout k
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.remplit_carres(lignes, colonnes, couleurs=couleurs, refresh=False)
+
+
+def plot_segments(segments, couleur="black"):
+    """Affiche des segments horizontaux de pixels en une seule fois.
+
+    Chaque segment (ligne, colonne, longueur) est équivalent à
+    plot(ligne, colonne+k, couleur) pour 0 <= k < longueur, mais est écrit
+    d'un seul bloc : c'est la façon la plus rapide d'afficher une forme
+    pleine ligne par ligne.
+    Remarque : l'affichage n'est vraiment effectué à l'écran qu'après appel
+    de la fonction refresh().
+    Paramètres :
+    - segments (itérable de triplets d'entiers) : (ligne, colonne, longueur)
+    - couleur (paramètre optionnel, chaîne de caractères) : couleur de tous
+      les segments (défaut : le noir)
+    Préconditions :
+    - la fenêtre doit avoir été ouverte précédemment : la fonction
+      ouvre_fenetre(hauteur, largeur) doit avoir été appelée
+    - chaque segment est entièrement dans la fenêtre
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.remplit_segments(segments, couleur=couleur, refresh=False)
+
+
+def _est_numpy(x):
+    """interne: Teste si x est un tableau NumPy, sans importer NumPy."""
+    return type(x).__module__ == "numpy"
+
+
+def _valeurs_numpy(np, couleurs, n=None):
+    """interne: Couleurs en octets (rouge, vert, bleu), tableau NumPy.
+
+    Une seule couleur (voir _couleur_unique, pour n cases) donne un tableau
+    de 3 octets, une séquence de n couleurs un tableau (n, 3).
+    """
+    if _couleur_unique(couleurs, n):
+        return np.frombuffer(_octets_rgb(couleurs), dtype=np.uint8)
+    if _est_numpy(couleurs) and couleurs.dtype.kind in "ui":
+        maximum = 0xFFFFFF if couleurs.ndim == 1 else 0xFF
+        assert len(couleurs) == 0 or (couleurs.min() >= 0
+                                      and couleurs.max() <= maximum), \
+            "ERREUR : couleur invalide !"
+        if couleurs.ndim == 1:
+            # entiers 0xRRGGBB : on sépare les trois composantes
+            couleurs = np.stack((couleurs >> 16, couleurs >> 8, couleurs),
+                                axis=-1)
+        return couleurs.astype(np.uint8, copy=False)
+    # une seule conversion par couleur distincte : chaque case reçoit le
+    # numéro de sa couleur dans la palette
+    noms = {}
+    indices = np.fromiter((noms.setdefault(c, len(noms)) for c in couleurs),
+                          dtype=np.intp, count=len(couleurs))
+    palette = np.frombuffer(b"".join(_octets_rgb(c) for c in noms),
+                            dtype=np.uint8).reshape(-1, 3)
+    return palette[indices]
+
+
+def _deplie(np, longueurs):
+    """interne: Numérote les éléments de blocs consécutifs (NumPy).
+
+    Pour des blocs de longueurs[k] éléments mis bout à bout, renvoie pour
+    chaque élément le numéro de son bloc et sa position dans le bloc.
+    """
+    blocs = np.repeat(np.arange(len(longueurs)), longueurs)
+    debuts = np.cumsum(longueurs) - longueurs
+    return blocs, np.arange(len(blocs)) - debuts[blocs]
+
+
+def _par_lots(np, longueurs, taille=1 << 20):
+    """interne: Découpe des blocs en lots d'au plus taille éléments.
+
+    Génère les couples (a, b) : les blocs a à b-1 forment un lot (un bloc
+    plus grand que taille forme un lot à lui seul).
+    """
+    cumul = np.cumsum(longueurs)
+    a = 0
+    while a < len(cumul):
+        avant = cumul[a-1] if a else 0
+        b = max(int(np.searchsorted(cumul, avant + taille, "right")), a+1)
+        yield a, b
+        a = b
 
 
 def refresh():
@@ -73,7 +213,175 @@ def refresh():
       ouvre_fenetre() doit avoir été appelée
     """
     assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
-    fengra.update()
+    fengra.refresh()
+
+
+def exporte(nom_fichier):
+    """Enregistre le contenu de la fenêtre graphique dans un fichier image.
+
+    Paramètre :
+    - nom_fichier (chaîne de caractères) : nom du fichier, terminé par
+      ".png" ou ".ppm" selon le format voulu
+    Précondition :
+    - la fenêtre doit avoir été ouverte précédemment : la fonction
+      ouvre_fenetre() doit avoir été appelée
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.exporte(nom_fichier)
+
+
+def enregistre(nom_fichier, ips=25):
+    """Enregistre toutes les images affichées par refresh() dans un fichier.
+
+    Chaque appel de refresh() ajoute une image au fichier, au fur et à mesure
+    (la mémoire utilisée ne dépend pas de la durée de l'enregistrement).
+    Les images identiques successives ne sont enregistrées qu'une fois.
+    Paramètres :
+    - nom_fichier (chaîne de caractères) : nom du fichier, terminé par
+      ".png" (animation APNG) ou ".ppm" (suite d'images PPM, lisible par
+      exemple par ffmpeg)
+    - ips (paramètre optionnel, entier) : nombre d'images par seconde de
+      l'animation (défaut : 25)
+    Précondition :
+    - la fenêtre doit avoir été ouverte précédemment : la fonction
+      ouvre_fenetre() doit avoir été appelée
+    L'enregistrement se termine à la fermeture de la fenêtre.
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.enregistre(nom_fichier, ips)
+
+
+def calcule_pixels(fonction, par_tuile=False, processus=None):
+    """Calcule la couleur de tous les pixels, en parallèle.
+
+    Les pixels sont répartis en tuiles calculées par plusieurs processus (un
+    par cœur par défaut), et chaque tuile est affichée dès qu'elle est prête
+    (voir fenetre.calcule_pixels). À l'écran, la fonction rend la main tout
+    de suite, et la fenêtre continue de réagir (par exemple pendant
+    attend_fenetre()).
+    Paramètres :
+    - fonction : fonction(ligne, colonne) qui renvoie la couleur d'un pixel
+      ("#rrggbb", nom de couleur courant ou entier 0xRRGGBB), définie au
+      premier niveau du programme (pas de lambda). Avec par_tuile=True,
+      fonction(i0, j0, i1, j1) renvoie les octets (rouge, vert, bleu) des
+      pixels [i0,i1[x[j0,j1[, ligne par ligne.
+    - par_tuile (paramètre optionnel, booléen) : voir fonction (défaut :
+      False)
+    - processus (paramètre optionnel, entier) : nombre de processus (défaut :
+      nombre de cœurs)
+    Préconditions :
+    - la fenêtre doit avoir été ouverte précédemment, avec tampon=True
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.calcule_pixels(fonction, par_tuile, processus)
+
+
+def partage_tampon():
+    """Partage les pixels de la fenêtre avec un autre processus.
+
+    L'autre processus dessine les images avec graph.producteur(nom), et
+    chaque refresh() affiche la dernière image qu'il a publiée (voir
+    fenetre.partage_tampon).
+    Précondition :
+    - la fenêtre doit avoir été ouverte précédemment, avec tampon=True
+    Retourne le nom de la mémoire partagée (chaîne de caractères).
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    return fengra.partage_tampon()
+
+
+def trace_lignes(lignes, couleurs="black"):
+    """Trace des segments de droite, pixel par pixel.
+
+    Remarque : comme pour plot(), l'affichage n'est vraiment effectué à
+    l'écran qu'après appel de la fonction refresh(). Les pixels hors de la
+    fenêtre sont ignorés.
+    Paramètres :
+    - lignes (séquence de quadruplets d'entiers, ou tableau NumPy (n, 4)) :
+      (ligne1, colonne1, ligne2, colonne2) des deux extrémités de chaque
+      segment
+    - couleurs (paramètre optionnel) : une couleur pour tous les segments
+      (défaut : le noir), ou une séquence d'une couleur par segment
+    Précondition :
+    - la fenêtre doit avoir été ouverte précédemment, avec tampon=True
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.trace_lignes(lignes, couleurs, refresh=False)
+
+
+def trace_cercles(cercles, couleurs="black", plein=False):
+    """Trace des cercles (ou des disques si plein=True), pixel par pixel.
+
+    Voir trace_lignes. Chaque cercle est donné par (ligne, colonne, rayon),
+    le rayon étant en pixels.
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.trace_cercles(cercles, couleurs, plein, refresh=False)
+
+
+def remplit_rectangles(rectangles, couleurs="black"):
+    """Remplit des rectangles, pixel par pixel.
+
+    Voir trace_lignes. Chaque rectangle est donné par (ligne1, colonne1,
+    ligne2, colonne2), deux coins opposés inclus dans le rectangle.
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.remplit_rectangles(rectangles, couleurs, refresh=False)
+
+
+def remplit_polygones(polygones, couleurs="black"):
+    """Remplit des polygones, pixel par pixel.
+
+    Voir trace_lignes. Chaque polygone est donné par la liste de ses
+    sommets (ligne, colonne), qui sont des coins de pixels (voir
+    fenetre.remplit_polygones).
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.remplit_polygones(polygones, couleurs, refresh=False)
+
+
+def attend_evenements(max_n=None, delai=None):
+    """Attend un événement, puis renvoie tous ceux qui sont en attente.
+
+    Voir fenetre.attend_evenements : renvoie une liste d'au plus max_n
+    événements (tous par défaut), vide si le délai delai (en millisecondes,
+    par défaut infini) expire avant le premier.
+    Précondition :
+    - la fenêtre doit avoir été ouverte précédemment : la fonction
+      ouvre_fenetre() doit avoir été appelée
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    return fengra.attend_evenements(max_n, delai)
+
+
+def active_mesures(rappel=None):
+    """Active (et remet à zéro) les compteurs de performances de la fenêtre.
+
+    Voir fenetre.active_mesures : les objets graphiques créés et supprimés,
+    les rafraichissements et leur durée, et le délai de réponse aux
+    événements sont comptés. Tant qu'elles ne sont pas activées, les
+    mesures ne ralentissent pas le programme.
+    Paramètre :
+    - rappel (paramètre optionnel, fonction) : appelée avec ("update",
+      durée) après chaque rafraichissement, et ("evenement", délai) pour
+      chaque événement renvoyé, en secondes
+    Précondition :
+    - la fenêtre doit avoir été ouverte précédemment : la fonction
+      ouvre_fenetre() doit avoir été appelée
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    fengra.active_mesures(rappel)
+
+
+def mesures():
+    """Renvoie un instantané des compteurs de performances (dictionnaire).
+
+    Voir fenetre.mesures pour la liste des compteurs.
+    Précondition :
+    - les mesures ont été activées par active_mesures()
+    """
+    assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
+    return fengra.mesures()
 
 
 def attend_fenetre():
@@ -81,6 +389,7 @@ def attend_fenetre():
 
     L'utilisateur peut quitter en fermant la fenêtre grâce au bouton de son
     environnement graphique, ou en appuyant la touche 'esc' ou 'q'.
+    Une fenêtre hors écran est fermée immédiatement.
     Remarque : si vous n'appelez pas cette fonction avant la fin de votre
     programme, la fenêtre se ferme automatiquement lorsqu'il s'arrête.
     Précondition :
@@ -90,7 +399,7 @@ def attend_fenetre():
     global fengra
 
     assert fengra, "ERREUR : la fonction ouvre_fenetre() n'a pas été appelée !"
-    fengra.update()
+    fengra.refresh()
     while True:
         p = fengra.attend_clic()
         if p[0] == "FIN":
@@ -103,6 +412,202 @@ def attend_fenetre():
     fengra = None
 
 
+###########################################################################
+# couleurs : conversion des couleurs tkinter en entiers 0xRRGGBB          #
+###########################################################################
+
+# table des couleurs X11 de tkinter, reconnue sans interroger tkinter (les
+# fenêtres hors écran et les processus de calcul n'ont pas tkinter). Chaque
+# entrée est "nom:rrggbb", ou "nom:rrggbb:r1:r2:r3:r4" pour les variantes
+# nom1 à nom4. Les noms sont en minuscules, sans espaces ; ceux qui
+# contiennent "gray" s'écrivent aussi avec "grey".
+_TABLE_X11 = """
+    snow:fffafa:fffafa:eee9e9:cdc9c9:8b8989 ghostwhite:f8f8ff
+    whitesmoke:f5f5f5 gainsboro:dcdcdc floralwhite:fffaf0 oldlace:fdf5e6
+    linen:faf0e6 antiquewhite:faebd7:ffefdb:eedfcc:cdc0b0:8b8378
+    papayawhip:ffefd5 blanchedalmond:ffebcd
+    bisque:ffe4c4:ffe4c4:eed5b7:cdb79e:8b7d6b
+    peachpuff:ffdab9:ffdab9:eecbad:cdaf95:8b7765
+    navajowhite:ffdead:ffdead:eecfa1:cdb38b:8b795e moccasin:ffe4b5
+    cornsilk:fff8dc:fff8dc:eee8cd:cdc8b1:8b8878
+    ivory:fffff0:fffff0:eeeee0:cdcdc1:8b8b83
+    lemonchiffon:fffacd:fffacd:eee9bf:cdc9a5:8b8970
+    seashell:fff5ee:fff5ee:eee5de:cdc5bf:8b8682
+    honeydew:f0fff0:f0fff0:e0eee0:c1cdc1:838b83 mintcream:f5fffa
+    azure:f0ffff:f0ffff:e0eeee:c1cdcd:838b8b aliceblue:f0f8ff lavender:e6e6fa
+    lavenderblush:fff0f5:fff0f5:eee0e5:cdc1c5:8b8386
+    mistyrose:ffe4e1:ffe4e1:eed5d2:cdb7b5:8b7d7b white:ffffff black:000000
+    darkslategray:2f4f4f:97ffff:8deeee:79cdcd:528b8b dimgray:696969
+    slategray:708090:c6e2ff:b9d3ee:9fb6cd:6c7b8b lightslategray:778899
+    gray:bebebe lightgray:d3d3d3 midnightblue:191970 navy:000080
+    navyblue:000080 cornflowerblue:6495ed darkslateblue:483d8b
+    slateblue:6a5acd:836fff:7a67ee:6959cd:473c8b mediumslateblue:7b68ee
+    lightslateblue:8470ff mediumblue:0000cd
+    royalblue:4169e1:4876ff:436eee:3a5fcd:27408b
+    blue:0000ff:0000ff:0000ee:0000cd:00008b
+    dodgerblue:1e90ff:1e90ff:1c86ee:1874cd:104e8b
+    deepskyblue:00bfff:00bfff:00b2ee:009acd:00688b
+    skyblue:87ceeb:87ceff:7ec0ee:6ca6cd:4a708b
+    lightskyblue:87cefa:b0e2ff:a4d3ee:8db6cd:607b8b
+    steelblue:4682b4:63b8ff:5cacee:4f94cd:36648b
+    lightsteelblue:b0c4de:cae1ff:bcd2ee:a2b5cd:6e7b8b
+    lightblue:add8e6:bfefff:b2dfee:9ac0cd:68838b powderblue:b0e0e6
+    paleturquoise:afeeee:bbffff:aeeeee:96cdcd:668b8b darkturquoise:00ced1
+    mediumturquoise:48d1cc turquoise:40e0d0:00f5ff:00e5ee:00c5cd:00868b
+    cyan:00ffff:00ffff:00eeee:00cdcd:008b8b
+    lightcyan:e0ffff:e0ffff:d1eeee:b4cdcd:7a8b8b
+    cadetblue:5f9ea0:98f5ff:8ee5ee:7ac5cd:53868b mediumaquamarine:66cdaa
+    aquamarine:7fffd4:7fffd4:76eec6:66cdaa:458b74 darkgreen:006400
+    darkolivegreen:556b2f:caff70:bcee68:a2cd5a:6e8b3d
+    darkseagreen:8fbc8f:c1ffc1:b4eeb4:9bcd9b:698b69
+    seagreen:2e8b57:54ff9f:4eee94:43cd80:2e8b57 mediumseagreen:3cb371
+    lightseagreen:20b2aa palegreen:98fb98:9aff9a:90ee90:7ccd7c:548b54
+    springgreen:00ff7f:00ff7f:00ee76:00cd66:008b45 lawngreen:7cfc00
+    green:00ff00:00ff00:00ee00:00cd00:008b00
+    chartreuse:7fff00:7fff00:76ee00:66cd00:458b00 mediumspringgreen:00fa9a
+    greenyellow:adff2f limegreen:32cd32 yellowgreen:9acd32 forestgreen:228b22
+    olivedrab:6b8e23:c0ff3e:b3ee3a:9acd32:698b22 darkkhaki:bdb76b
+    khaki:f0e68c:fff68f:eee685:cdc673:8b864e palegoldenrod:eee8aa
+    lightgoldenrodyellow:fafad2
+    lightyellow:ffffe0:ffffe0:eeeed1:cdcdb4:8b8b7a
+    yellow:ffff00:ffff00:eeee00:cdcd00:8b8b00
+    gold:ffd700:ffd700:eec900:cdad00:8b7500
+    lightgoldenrod:eedd82:ffec8b:eedc82:cdbe70:8b814c
+    goldenrod:daa520:ffc125:eeb422:cd9b1d:8b6914
+    darkgoldenrod:b8860b:ffb90f:eead0e:cd950c:8b6508
+    rosybrown:bc8f8f:ffc1c1:eeb4b4:cd9b9b:8b6969
+    indianred:cd5c5c:ff6a6a:ee6363:cd5555:8b3a3a saddlebrown:8b4513
+    sienna:a0522d:ff8247:ee7942:cd6839:8b4726 peru:cd853f
+    burlywood:deb887:ffd39b:eec591:cdaa7d:8b7355 beige:f5f5dc
+    wheat:f5deb3:ffe7ba:eed8ae:cdba96:8b7e66 sandybrown:f4a460
+    tan:d2b48c:ffa54f:ee9a49:cd853f:8b5a2b
+    chocolate:d2691e:ff7f24:ee7621:cd661d:8b4513
+    firebrick:b22222:ff3030:ee2c2c:cd2626:8b1a1a
+    brown:a52a2a:ff4040:ee3b3b:cd3333:8b2323 darksalmon:e9967a
+    salmon:fa8072:ff8c69:ee8262:cd7054:8b4c39
+    lightsalmon:ffa07a:ffa07a:ee9572:cd8162:8b5742
+    orange:ffa500:ffa500:ee9a00:cd8500:8b5a00
+    darkorange:ff8c00:ff7f00:ee7600:cd6600:8b4500
+    coral:ff7f50:ff7256:ee6a50:cd5b45:8b3e2f lightcoral:f08080
+    tomato:ff6347:ff6347:ee5c42:cd4f39:8b3626
+    orangered:ff4500:ff4500:ee4000:cd3700:8b2500
+    red:ff0000:ff0000:ee0000:cd0000:8b0000
+    hotpink:ff69b4:ff6eb4:ee6aa7:cd6090:8b3a62
+    deeppink:ff1493:ff1493:ee1289:cd1076:8b0a50
+    pink:ffc0cb:ffb5c5:eea9b8:cd919e:8b636c
+    lightpink:ffb6c1:ffaeb9:eea2ad:cd8c95:8b5f65
+    palevioletred:db7093:ff82ab:ee799f:cd6889:8b475d
+    maroon:b03060:ff34b3:ee30a7:cd2990:8b1c62 mediumvioletred:c71585
+    violetred:d02090:ff3e96:ee3a8c:cd3278:8b2252
+    magenta:ff00ff:ff00ff:ee00ee:cd00cd:8b008b violet:ee82ee
+    plum:dda0dd:ffbbff:eeaeee:cd96cd:8b668b
+    orchid:da70d6:ff83fa:ee7ae9:cd69c9:8b4789
+    mediumorchid:ba55d3:e066ff:d15fee:b452cd:7a378b
+    darkorchid:9932cc:bf3eff:b23aee:9a32cd:68228b darkviolet:9400d3
+    blueviolet:8a2be2 purple:a020f0:9b30ff:912cee:7d26cd:551a8b
+    mediumpurple:9370db:ab82ff:9f79ee:8968cd:5d478b
+    thistle:d8bfd8:ffe1ff:eed2ee:cdb5cd:8b7b8b debianred:d70751
+    darkgray:a9a9a9 darkblue:00008b darkcyan:008b8b darkmagenta:8b008b
+    darkred:8b0000 lightgreen:90ee90 aqua:00ffff fuchsia:ff00ff lime:00ff00
+    olive:808000 silver:c0c0c0 teal:008080 indigo:4b0082 crimson:dc143c
+"""
+_COULEURS_NOMMEES = {}
+for _entree in _TABLE_X11.split():
+    _nom, *_valeurs = _entree.split(":")
+    for _suffixe, _valeur in zip(("", "1", "2", "3", "4"), _valeurs):
+        _COULEURS_NOMMEES[_nom + _suffixe] = int(_valeur, 16)
+        _COULEURS_NOMMEES[(_nom + _suffixe).replace("gray", "grey")] = \
+            int(_valeur, 16)
+del _entree, _nom, _valeurs, _suffixe, _valeur
+# niveaux de gris gray0 (noir) à gray100 (blanc)
+for _n in range(101):
+    _COULEURS_NOMMEES["gray%d" % _n] = _COULEURS_NOMMEES["grey%d" % _n] = \
+        0x010101 * int(_n*2.55 + 0.5)
+del _n
+
+"""_resolveur_tk (global): méthode winfo_rgb de la dernière fenêtre ouverte,
+pour les noms de couleurs qui ne sont pas dans la table ci-dessus."""
+_resolveur_tk = None
+
+
+@functools.lru_cache(maxsize=1024)
+def couleur_rgb(couleur):
+    """Convertit une couleur en un entier 0xRRGGBB (rouge, vert, bleu).
+
+    Les résultats sont gardés en cache : chaque couleur n'est analysée
+    qu'une seule fois.
+    Paramètre :
+    - couleur : nom de couleur tkinter ("black", "dark grey", etc.), code
+      RGB ("#F00", "#FF0000", "#FFF000000" ou "#FFFF00000000"), entier
+      0xRRGGBB, ou triplet d'entiers (rouge, vert, bleu) de 0 à 255
+    Précondition :
+    - la couleur est valide. Tous les noms de la table X11 sont reconnus ;
+      les couleurs propres au système (comme "SystemButtonFace") ne le sont
+      que si une fenêtre est ouverte.
+    """
+    invalide = "ERREUR : couleur invalide : %r" % (couleur,)
+    if isinstance(couleur, int):
+        assert 0 <= couleur <= 0xFFFFFF, invalide
+        return couleur
+    if isinstance(couleur, tuple):
+        assert _couleur_unique(couleur), invalide
+        return couleur[0] << 16 | couleur[1] << 8 | couleur[2]
+    assert isinstance(couleur, str) and couleur, invalide
+    if couleur[0] == "#":
+        # comme tkinter : chaque composante garde ses bits de poids fort
+        chiffres = couleur[1:]
+        n = len(chiffres) // 3
+        assert n in (1, 2, 3, 4) and len(chiffres) == 3*n \
+            and not chiffres.strip("0123456789abcdefABCDEF"), invalide
+        rgb = 0
+        for k in range(3):
+            v = int(chiffres[k*n:(k+1)*n], 16)
+            rgb = (rgb << 8) | (v << 4 if n == 1 else v >> 4*(n-2))
+        return rgb
+    rgb = _COULEURS_NOMMEES.get(couleur.replace(" ", "").lower())
+    if rgb is not None:
+        return rgb
+    if _resolveur_tk is not None:
+        try:
+            r, g, b = _resolveur_tk(couleur)
+        except tk.TclError:
+            pass
+        else:
+            return (r >> 8) << 16 | (g >> 8) << 8 | b >> 8
+    assert False, invalide
+
+
+def _couleur_unique(couleurs, n=None):
+    """interne: Teste si couleurs est une seule couleur (voir couleur_rgb).
+
+    Une chaîne ou un entier est une seule couleur. Un triplet d'entiers de
+    0 à 255 aussi, sauf pour n=3 cases : c'est alors une couleur par case
+    (pour une même couleur (rouge, vert, bleu) sur 3 cases, donner une
+    liste de couleurs). Toute autre séquence donne une couleur par élément.
+    """
+    if isinstance(couleurs, (str, int)):
+        return True
+    return isinstance(couleurs, tuple) and len(couleurs) == 3 and n != 3 \
+        and all(isinstance(v, int) and 0 <= v <= 255 for v in couleurs)
+
+
+@functools.lru_cache(maxsize=1024)
+def _octets_rgb(couleur):
+    """interne: Couleur en 3 octets (rouge, vert, bleu) pour les tampons."""
+    return couleur_rgb(couleur).to_bytes(3, "big")
+
+
+@functools.lru_cache(maxsize=1024)
+def _couleur_tk(couleur):
+    """interne: Couleur vérifiée, au format "#rrggbb" passé à tkinter.
+
+    La chaîne vide (objet transparent pour tkinter) est acceptée telle quelle.
+    """
+    if couleur == "":
+        return couleur
+    return "#%06x" % couleur_rgb(couleur)
+
+
 # La suite de ce module contient la classe fenetre de graph.py version 0.1d
 """Interface graphique basée sur tkinter, événementielle mais non asynchrone.
 
@@ -125,7 +630,7 @@ Distribué sous licence publique WTFPL, version 2 (http://www.wtfpl.net/)
 """
 
 
-class fenetre(tk.Canvas):
+class fenetre:
     """Classe principale pour une fenêtre graphique contenant une grille 2D.
 
     Arguments optionnels de création :
@@ -134,21 +639,28 @@ class fenetre(tk.Canvas):
     - pixels (int): nombre de pixels de côté d'une case (défaut: 80)
     - axes (bool): si True, affiche un cadre : des lignes verticales et
         horizontales qui séparent les cases (True par défaut)
-
-    Hérite de la classe canvas, on peut directement appeler les méthodes sur
-    les canvas sur une fenêtre (pour les experts !)
+    - tampon (bool): si True, la fenêtre possède un tampon de pixels (une
+        couleur par case) affiché sous la forme d'une seule image, voir
+        colorie_case() (False par défaut)
+    - hors_ecran (bool): si True, la fenêtre n'est pas affichée et tkinter
+        n'est pas utilisé : tout est dessiné en mémoire, et l'image obtenue
+        peut être enregistrée avec exporte() (False par défaut)
+
+    Contient un canvas tkinter (attribut canevas), et on peut directement
+    appeler les méthodes des canvas sur une fenêtre (pour les experts !)
     Voir la documentation, chapitre "8. The Canvas widget" du document :
     http://infohost.nmt.edu/tcc/help/pubs/tkinter/web/index.html
     """
 
     def __init__(
-        self, taille=(8, 8), pixels=80, axes=True
+        self, taille=(8, 8), pixels=80, axes=True, tampon=False,
+        hors_ecran=False
     ):
         """Initialise l'instance de fenêtre.
 
-        Crée un objet tkinter root, le canvas (dont hérite cette classe
-        fenetre) et redirige les événements utilisés vers les fonctions
-        adéquates.
+        Crée un objet tkinter root, le canvas (attribut canevas) et redirige
+        les événements utilisés vers les fonctions adéquates. Hors écran, le
+        canvas est remplacé par un canvas en mémoire.
         Les arguments sont décrits dans la documentation de la classe fenêtre.
         """
         # les quelques méthodes privées ci-dessous servent à réagir aux
@@ -161,8 +673,25 @@ class fenetre(tk.Canvas):
             j = min((evenement.x-1)//self.pixels, self.taille[1]-1)
             # ajoute (ligne,colonne) à la queue
             self.eventq.put(("clic", (i, j)))
-            # et sort de la mainloop d'attente
-            self.root.quit()
+            # et réveille attend_clic
+            self._reveille()
+
+        # privée: appelée par le clic droit et la molette sur une grille
+        # virtuelle (voir affiche_grille) ; zoom: variation du niveau de zoom,
+        # ou None pour centrer la vue sur la case
+        def vue(evenement, zoom):
+            if self.grille is None:
+                return
+            i = min(max((evenement.y-1)//self.pixels, 0), self.taille[0]-1)
+            j = min(max((evenement.x-1)//self.pixels, 0), self.taille[1]-1)
+            if zoom is None:
+                pass
+            elif getattr(evenement, "delta", 0) > 0:
+                zoom = -1
+            elif getattr(evenement, "delta", 0) < 0:
+                zoom = 1
+            self.eventq.put(("vue", (i, j, zoom)))
+            self._reveille()
 
         # privée: appelée si l'utilisateur tape une touche
         def key(evenement):
@@ -173,63 +702,172 @@ class fenetre(tk.Canvas):
             # self.eventq.put("clic", (i, j))
             self.eventq.put(("touche", evenement.keysym))
 
-            # et sort de la mainloop d'attente
-            self.root.quit()
+            # et réveille attend_clic
+            self._reveille()
 
         # privée: appelée si l'utilisateur ferme la fenêtre
         def async_end():
-            # met "FIN" dans la queue et sort de mainloop
+            # met "FIN" dans la queue et réveille attend_clic
             # utilisation en appel asynchrone (provoqué par un événement)
             self.eventq.put(("FIN", None))
+            self._reveille()
             self.ferme()
 
-        # privée: vérifie régulièrement s'il n'y a pas des événements en
-        # attente dans la queue, et réveille le thread d'attente si oui.
-        def checke():
-            self.after_id = self.root.after(1000, checke)
-            # arrête mainloop
-            self.root.quit()
-
         #################################
         # l'initialisation démarre ici
         self.taille = taille
         self.pixels = pixels
+        self.hors_ecran = hors_ecran
         self.root = None
-        self.after_id = None
-
-        self.eventq = queue.Queue()
-
-        self.root = tk.Tk()
-        self.root.grid()
-        # on peut initialiser des boutons (dans un autre frame) ici
-        # self.frame = tk.Frame(root)
-
-        # crée LE canvas, pour un plateau de taille (h*l) cases, de pixels de
-        # côté
-        tk.Canvas.__init__(
-                self,
-                self.root,
-                height=self.taille[0]*self.pixels,
-                width=self.taille[1]*self.pixels,
-                background="#ddd",
-                takefocus=True,
-                borderwidth=0,
-                highlightthickness=1)
-        self.grid(row=0, column=0)
-        self.focus_set()
-
-        # appelle click (ci-dessus) si on clique dans le canvas
-        self.bind("<Button-1>", click)
-        # appelle key (ci-dessus) si on tape une touche
-        self.bind("<Any-KeyPress>", key)
-
-        # appelle checke au moins une fois par seconde
-        self.after_id = self.root.after(1000, checke)
-        # appelle async_end (ci-dessous) si on ferme la fenêtre
-        self.root.protocol("WM_DELETE_WINDOW", async_end)
-
-        # affiche la grille de départ
-        self.affiche_matrice(axes=axes)
+        self.canevas = None
+        self._mise_en_place_attendue = None
+        # enregistrement des images successives (voir enregistre)
+        self.enregistreur = None
+        # calcul parallèle en cours (voir calcule_pixels) : processus de
+        # calcul, tuiles attendues et timer tk qui les reçoit
+        self.executeur = None
+        self.tuiles_attendues = []
+        self.idd_calcul = None
+        # exception d'une tuile reçue par le timer tk, relancée au prochain
+        # appel de attend_calcul, refresh ou attend_clic
+        self.erreur_calcul = None
+        # tampon partagé avec un autre processus (voir partage_tampon), et
+        # numéro de la dernière image lue
+        self.memoire_partagee = None
+        self.sequence_partagee = 0
+        # grille virtuelle affichée (voir affiche_grille) : version affichée,
+        # coin haut gauche de la vue (en cases de la grille) et niveau de
+        # zoom (une case de la fenêtre montre 2**niveau x 2**niveau cases)
+        self.grille = None
+        self.version_grille = None
+        self.origine_vue = (0, 0)
+        self.niveau_vue = 0
+        # tampon de pixels : 3 octets (rouge, vert, bleu) par case
+        self.tampon = None
+        # dernière matrice affichée par affiche_matrice, avec ses axes (les
+        # pions de chaque case sont dans l'index des cases, voir objet_case)
+        self.matrice_affichee = None
+        self.axes_affiches = None
+        # compteurs de performances, None si désactivés (voir active_mesures)
+        self.compteurs = None
+        # objets réutilisables : type ("oval", "rectangle", "text") des
+        # objets créés par affiche_pion, remplit_carre et affiche_texte, et
+        # pour chaque type les objets cachés par supprime (voir _recycle)
+        self.types_objets = {}
+        self.reserve = {}
+        # polices des textes, une par (famille, taille) (voir _police)
+        self.polices = {}
+        # index des cases : (ligne, colonne, genre) -> liste des identifiants
+        # des pions (genre "pion") ou des carrés (genre "carre") de la case,
+        # le dernier au-dessus (un déplacement peut en superposer plusieurs),
+        # et identifiant -> (ligne, colonne, genre)
+        self.objets_cases = {}
+        self.cases_objets = {}
+        # rafraichissements regroupés (voir _rafraichit) : date à partir de
+        # laquelle le prochain peut être fait, et rafraichissement en attente
+        # (identifiant du timer tk, ou True hors écran)
+        self.prochain_rafraichissement = 0.0
+        self.rafraichissement_prevu = None
+
+        self.eventq = _file_evenements(self.taille_file, self.oubli_file,
+                                       self.fusion_touches)
+        # position de la souris (voir position_souris) et déplacements mis
+        # dans la queue (voir suit_souris)
+        self.souris = (0, 0)
+        self.souris_liee = False
+        self.souris_suivie = False
+
+        if hors_ecran:
+            # le canvas en mémoire sert aussi de root (voir ferme)
+            self.root = self.canevas = _canevas_memoire(
+                self.taille[0]*self.pixels, self.taille[1]*self.pixels,
+                self.couleur_fond)
+        else:
+            _importe_tk()
+            self.root = tk.Tk()
+            self.root.grid()
+            # variable tk modifiée à chaque événement mis dans la queue :
+            # attend_clic dort en attendant qu'elle change (sans scrutation)
+            self.signal = tk.IntVar(self.root)
+            # on peut initialiser des boutons (dans un autre frame) ici
+            # self.frame = tk.Frame(root)
+
+            # crée LE canvas, pour un plateau de taille (h*l) cases, de
+            # pixels de côté
+            self.canevas = tk.Canvas(
+                    self.root,
+                    height=self.taille[0]*self.pixels,
+                    width=self.taille[1]*self.pixels,
+                    background=self.couleur_fond,
+                    takefocus=True,
+                    borderwidth=0,
+                    highlightthickness=1)
+            self.canevas.grid(row=0, column=0)
+            self.canevas.focus_set()
+            # les noms de couleurs inconnus de couleur_rgb() sont demandés à
+            # tk
+            global _resolveur_tk
+            _resolveur_tk = self.canevas.winfo_rgb
+
+        if tampon:
+            self.tampon = bytearray(_octets_rgb(self.couleur_fond)
+                                    * (self.taille[0]*self.taille[1]))
+            if hors_ecran:
+                # le canvas en mémoire dessine directement le tampon
+                self.image = self.image_affichee = _image_tampon(
+                    self.tampon, self.taille, self.pixels)
+            else:
+                # image à la taille de la grille (une case = un pixel), et
+                # image affichée agrandie d'un facteur pixels si besoin
+                self.image = tk.PhotoImage(master=self.root,
+                                           height=self.taille[0],
+                                           width=self.taille[1])
+                if self.pixels == 1:
+                    self.image_affichee = self.image
+                else:
+                    self.image_affichee = tk.PhotoImage(
+                        master=self.root,
+                        height=self.taille[0]*self.pixels,
+                        width=self.taille[1]*self.pixels)
+            # tuiles modifiées depuis le dernier affichage : un octet par
+            # tuile de cote_tuile*cote_tuile cases, 1 si la tuile est à
+            # renvoyer à l'écran
+            self.tuiles_par_ligne = -(-self.taille[1] // self.cote_tuile)
+            self.tuiles_sales = bytearray(
+                self.tuiles_par_ligne
+                * -(-self.taille[0] // self.cote_tuile))
+
+        if not hors_ecran:
+            # appelle click (ci-dessus) si on clique dans le canvas
+            self.bind("<Button-1>", click)
+            # appelle key (ci-dessus) si on tape une touche
+            self.bind("<Any-KeyPress>", key)
+            # clic droit et molette (X11 : boutons 4 et 5) sur une grille
+            self.bind("<Button-3>", lambda e: vue(e, None))
+            self.bind("<Button-4>", lambda e: vue(e, -1))
+            self.bind("<Button-5>", lambda e: vue(e, 1))
+            self.bind("<MouseWheel>", lambda e: vue(e, 0))
+
+            # appelle async_end (ci-dessus) si on ferme la fenêtre
+            self.root.protocol("WM_DELETE_WINDOW", async_end)
+
+        # la grille de départ (image du tampon et axes) n'est créée qu'au
+        # premier affichage : voir _mise_en_place
+        self._mise_en_place_attendue = axes
+
+    def __getattr__(self, nom):
+        """interne: Délègue au canvas les attributs absents de fenetre.
+
+        Les méthodes trouvées sont gardées dans l'instance, pour que les
+        appels suivants ne repassent pas par ici.
+        """
+        if nom == "canevas":
+            # __init__ n'a pas encore créé le canvas
+            raise AttributeError(nom)
+        valeur = getattr(self.canevas, nom)
+        if callable(valeur):
+            self.__dict__[nom] = valeur
+        return valeur
 
     def __enter__(self):
         """interne: With -as: statement compatibility."""
@@ -245,9 +883,26 @@ class fenetre(tk.Canvas):
 
     def ferme(self):
         """Ferme la fenêtre (définitivement)."""
-        if self.after_id is not None:
-            self.root.after_cancel(self.after_id)
-            self.after_id = None
+        global _resolveur_tk
+        self.arrete_enregistrement()
+        self.arrete_calcul()
+        # comme le timer de arrete_calcul : un rafraichissement remis par
+        # _rafraichit ne doit pas survivre à la fenêtre
+        if self.root is not None:
+            self._annule_rafraichissement()
+        if self.memoire_partagee is not None:
+            # un producteur a pu retirer la mémoire du suivi des ressources
+            # de multiprocessing (voir producteur) : on l'y remet avant de la
+            # détruire
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self.memoire_partagee._name,
+                                      "shared_memory")
+            self.memoire_partagee.close()
+            self.memoire_partagee.unlink()
+            self.memoire_partagee = None
+        if self.root is not None and not self.hors_ecran \
+                and _resolveur_tk == self.canevas.winfo_rgb:
+            _resolveur_tk = None
         if self.root is not None:
             self.root.destroy()
             self.root = None
@@ -263,9 +918,12 @@ class fenetre(tk.Canvas):
         # privée: fonction appelée si l'utilisateur clique sur le message
         def c(event):
             self.eventq.put("ok")
-            self.root.quit()
+            self._reveille()
 
         assert self.root, "ERREUR : fenêtre fermée !"
+        if self.hors_ecran:
+            # personne pour lire le message
+            return True
         m = tk.Message(
                 self.root, text=message,
                 padx=20, pady=20,
@@ -292,33 +950,56 @@ class fenetre(tk.Canvas):
     # les matrices contiennent des entiers                                    #
     ###########################################################################
 
+    # couleur du fond de la fenêtre (et du tampon de pixels)
+    couleur_fond = "#ddd"
+
+    # côté (en cases) des tuiles du tampon de pixels renvoyées à l'écran
+    cote_tuile = 64
+
+    # nombre maximal d'objets cachés gardés par type (voir supprime)
+    taille_reserve = 256
+
+    # queue d'événements (voir _file_evenements) : nombre maximal
+    # d'événements en attente, événements oubliés quand elle est pleine
+    # ("anciens" ou "nouveaux"), et regroupement des touches répétées (non
+    # par défaut : deux appuis rapides sur une même touche sont deux coups)
+    taille_file = 256
+    oubli_file = "anciens"
+    fusion_touches = False
+
+    # nombre maximal de rafraichissements par seconde demandés par les
+    # fonctions d'affichage avec refresh=True (None : pas de limite), voir
+    # _rafraichit
+    ips_max = 60
+
     # couleurs utilisées par défaut
     default_color = ["black", "white", "red", "green", "blue",
                      "yellow", "cyan", "magenta", "orange", "darkgrey"]
 
     def affiche_matrice(
-        self, matrice=None, axes=True
+        self, matrice=None, axes=True, incremental=False
     ):
         """Affiche une matrice de jeu complète, avec les couleurs par défaut.
 
         Si matrice est égal à None (défaut), n'affiche que les axes
         Si axes=True (défaut) affiche les axes
+        Si incremental=True, la matrice est comparée à celle affichée par
+        l'appel précédent de affiche_matrice : seuls les pions des cases qui
+        ont changé sont créés, recoloriés ou supprimés, et les axes sont
+        conservés. Les autres objets graphiques ne sont pas effacés.
         Renvoie la liste des objets graphiques créés sans les axes.
         """
         assert self.root, "ERREUR : fenêtre fermée !"
+        if incremental and self.matrice_affichee is not None \
+                and axes == self.axes_affiches:
+            return self._affiche_differences(matrice)
         # efface tout avant de commencer :
         self.efface()
         # axes
         if axes:
-            for i in range(1, self.taille[0]):
-                self.create_line(1, i*self.pixels+1,
-                                 self.taille[1]*self.pixels+1, i*self.pixels+1,
-                                 width=1)
-            for i in range(1, self.taille[1]):
-                self.create_line(i*self.pixels+1, 1,
-                                 i*self.pixels+1, self.taille[0]*self.pixels+1,
-                                 width=1)
-        # pions
+            self._affiche_axes()
+        self.axes_affiches = axes
+        # pions, retenus case par case par l'index des cases (objet_case)
         o = []
         if matrice is not None:
             for i in range(self.taille[0]):
@@ -326,19 +1007,100 @@ class fenetre(tk.Canvas):
                     if matrice[i][j] is not None:
                         o.append(self.affiche_pion((i, j), matrice[i][j],
                                                    refresh=False))
-        # un seul update à la fin, pour la vitesse d'affichage
-        self.update()
+        self.matrice_affichee = self._copie_matrice(matrice)
+        # un seul rafraichissement à la fin, pour la vitesse d'affichage
+        self._rafraichit()
+        return o
+
+    def _affiche_axes(self, tags=()):
+        """interne: Affiche les lignes qui séparent les cases."""
+        for i in range(1, self.taille[0]):
+            self.create_line(1, i*self.pixels+1,
+                             self.taille[1]*self.pixels+1, i*self.pixels+1,
+                             width=1, tags=tags)
+        for i in range(1, self.taille[1]):
+            self.create_line(i*self.pixels+1, 1,
+                             i*self.pixels+1, self.taille[0]*self.pixels+1,
+                             width=1, tags=tags)
+
+    def _mise_en_place(self):
+        """interne: Crée la grille de départ, au premier affichage.
+
+        L'image du tampon et les axes sont placés sous les objets graphiques
+        créés depuis l'ouverture de la fenêtre.
+        """
+        axes = self._mise_en_place_attendue
+        self._mise_en_place_attendue = None
+        if self.tampon is not None:
+            self.create_image(1, 1, image=self.image_affichee, anchor="nw",
+                              tags="fond")
+        if axes:
+            self._affiche_axes(tags="fond")
+        self.tag_lower("fond")
+        self.axes_affiches = axes
+        self.matrice_affichee = self._copie_matrice(None)
+
+    def _affiche_differences(self, matrice):
+        """interne: Met à jour les pions des cases modifiées de la matrice.
+
+        Le pion de chaque case est pris dans l'index des cases (objet_case),
+        tenu à jour même si le programme a supprimé ou déplacé des pions.
+        """
+        ancienne = self.matrice_affichee
+        pions = self.objets_cases
+        o = []
+        for i in range(self.taille[0]):
+            ligne = None if matrice is None else matrice[i]
+            for j in range(self.taille[1]):
+                v = None if ligne is None else ligne[j]
+                pion = pions.get((i, j, "pion"))
+                pion = pion[-1] if pion else None
+                if v != ancienne[i][j]:
+                    if v is None:
+                        if pion is not None:
+                            self._libere_case(i, j, "pion")
+                            pion = None
+                    elif pion is None:
+                        pion = self.affiche_pion((i, j), v, refresh=False)
+                    else:
+                        self.itemconfigure(pion, fill=_couleur_tk(
+                            self._couleur_joueur(v)))
+                if pion is not None:
+                    o.append(pion)
+        self.matrice_affichee = self._copie_matrice(matrice)
+        self._rafraichit()
         return o
 
+    def _copie_matrice(self, matrice):
+        """interne: Copie la matrice affichée (toute à None si absente)."""
+        if matrice is None:
+            return [[None]*self.taille[1] for i in range(self.taille[0])]
+        return [list(matrice[i][:self.taille[1]])
+                for i in range(self.taille[0])]
+
     def efface(
         self
     ):
         """Efface tout de la fenêtre.
 
         Tous les objets créés précédemment dans la fenêtre sont supprimés.
+        Si la fenêtre a un tampon de pixels, il est remis à la couleur de fond.
         """
         assert self.root, "ERREUR : fenêtre fermée !"
-        self.delete(tk.ALL)
+        self.delete("all")
+        self.types_objets.clear()
+        self.reserve.clear()
+        self.objets_cases.clear()
+        self.cases_objets.clear()
+        # plus aucune matrice affichée, ni grille de départ à créer
+        self.matrice_affichee = None
+        self._mise_en_place_attendue = None
+        if self.tampon is not None:
+            self.tampon[:] = _octets_rgb(self.couleur_fond) \
+                * (self.taille[0]*self.taille[1])
+            self._envoie_tampon(tout=True)
+            # l'image est le premier objet, tous les autres s'affichent dessus
+            self.create_image(1, 1, image=self.image_affichee, anchor="nw")
 
     ###########################################################################
     # interface de niveau intermédiaire :                                     #
@@ -361,29 +1123,88 @@ class fenetre(tk.Canvas):
           si couleur est donné, joueur est ignoré.
         - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
 
+        Un pion déjà affiché dans la case est remplacé (voir objet_case).
         Retourne l'identifiant de l'objet graphique créé (int).
         """
         assert self.root, "ERREUR : fenêtre fermée !"
         if couleur is None:
-            if isinstance(joueur, int):
-                couleur = self.default_color[joueur % len(self.default_color)]
-            else:
-                couleur = self.default_color[0]
+            couleur = self._couleur_joueur(joueur)
 
         bord = self.pixels//10+1
         i, j = p
         assert 0 <= i < self.taille[0] and 0 <= j < self.taille[1], "ERREUR : \
 coordonnées hors dimension de la fenêtre !"
 
-        o = self.create_oval(j*self.pixels+bord+1,
-                             i*self.pixels+bord+1,
-                             (j+1)*self.pixels-bord+1,
-                             (i+1)*self.pixels-bord+1,
-                             width=1, fill=couleur)
+        self._libere_case(i, j, "pion")
+        o = self._recycle("oval",
+                          (j*self.pixels+bord+1,
+                           i*self.pixels+bord+1,
+                           (j+1)*self.pixels-bord+1,
+                           (i+1)*self.pixels-bord+1),
+                          width=1, fill=_couleur_tk(couleur))
+        self._indexe(o, i, j, "pion")
+        if refresh:
+            self._rafraichit()
+        return o
+
+    def affiche_pions(
+        self, lignes, colonnes, joueurs=0,
+        couleurs=None,
+        refresh=True
+    ):
+        """Affiche plusieurs pions en une seule fois.
+
+        Équivalent à affiche_pion((lignes[k], colonnes[k]), joueurs[k]) pour
+        tous les k, mais les préconditions ne sont vérifiées qu'une seule fois
+        et l'affichage n'est rafraîchi qu'à la fin.
+        - lignes, colonnes (séquences d'entiers de même longueur): positions
+        Paramètres optionnels :
+        - joueurs (int ou séquence d'int): numéro du joueur de tous les pions
+          ou de chaque pion (défaut: 0), utilisé si couleurs n'est pas donné
+        - couleurs (str ou séquence de str): couleur de tous les pions ou de
+          chaque pion (défaut: couleurs des joueurs)
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+
+        Retourne la liste des identifiants des objets graphiques créés.
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        n = len(lignes)
+        assert len(colonnes) == n, "ERREUR : lignes et colonnes doivent \
+avoir la même longueur !"
+        if n == 0:
+            return []
+        assert 0 <= min(lignes) and max(lignes) < self.taille[0] and \
+            0 <= min(colonnes) and max(colonnes) < self.taille[1], "ERREUR : \
+coordonnées hors dimension de la fenêtre !"
+        if couleurs is None:
+            if isinstance(joueurs, int):
+                couleurs = self._couleur_joueur(joueurs)
+            else:
+                couleurs = [self._couleur_joueur(j) for j in joueurs]
+        if _couleur_unique(couleurs, n):
+            couleurs = [couleurs]*n
+        assert len(couleurs) == n, "ERREUR : il faut autant de couleurs que \
+de pions !"
+
+        p = self.pixels
+        bord = p//10+1
+        o = []
+        for i, j, c in zip(lignes, colonnes, couleurs):
+            self._libere_case(i, j, "pion")
+            o.append(self._recycle("oval", (j*p+bord+1, i*p+bord+1,
+                                            (j+1)*p-bord+1, (i+1)*p-bord+1),
+                                   width=1, fill=_couleur_tk(c)))
+            self._indexe(o[-1], i, j, "pion")
         if refresh:
-            self.update()
+            self._rafraichit()
         return o
 
+    def _couleur_joueur(self, joueur):
+        """interne: Couleur par défaut des pions du joueur."""
+        if isinstance(joueur, int):
+            return self.default_color[joueur % len(self.default_color)]
+        return self.default_color[0]
+
     def deplace_pion(
         self, obj, pos, refresh=True
     ):
@@ -406,8 +1227,9 @@ coordonnées hors dimension de la fenêtre !"
             (j+1)*self.pixels-bord+1,
             (i+1)*self.pixels-bord+1
             )
+        self._deplace_index(obj, i, j)
         if refresh:
-            self.update()
+            self._rafraichit()
 
     def remplit_carre(
         self, p,
@@ -423,19 +1245,23 @@ coordonnées hors dimension de la fenêtre !"
         - contour (int): épaisseur de la bordure en pixels (défaut: 0)
         - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
 
+        Un carré déjà affiché dans la case est remplacé (voir objet_case).
         Retourne l'identifiant de l'objet graphique créé (int).
         """
         assert self.root, "ERREUR : fenêtre fermée !"
         i, j = p
         assert 0 <= i < self.taille[0] and 0 <= j < self.taille[1], "ERREUR : \
 coordonnées hors dimension de la fenêtre !"
-        o = self.create_rectangle(j*self.pixels+1,
-                                  i*self.pixels+1,
-                                  (j+1)*self.pixels,
-                                  (i+1)*self.pixels,
-                                  width=contour, fill=couleur)
+        self._libere_case(i, j, "carre")
+        o = self._recycle("rectangle",
+                          (j*self.pixels+1,
+                           i*self.pixels+1,
+                           (j+1)*self.pixels,
+                           (i+1)*self.pixels),
+                          width=contour, fill=_couleur_tk(couleur))
+        self._indexe(o, i, j, "carre")
         if refresh:
-            self.update()
+            self._rafraichit()
         return o
 
     def deplace_carre(
@@ -459,8 +1285,1011 @@ coordonnées hors dimension de la fenêtre !"
             (j+1)*self.pixels,
             (i+1)*self.pixels
             )
+        self._deplace_index(obj, i, j)
+        if refresh:
+            self._rafraichit()
+
+    def objet_case(self, p, genre="pion"):
+        """Renvoie l'objet graphique affiché dans la case p=(l,c).
+
+        - p ((int, int)): position dans la grille (ligne, colonne)
+        Paramètre optionnel :
+        - genre (str): "pion" (défaut) pour le pion de la case (voir
+          affiche_pion), "carre" pour son carré (voir remplit_carre)
+
+        Retourne l'identifiant de l'objet (int), ou None si la case n'en a
+        pas. Si plusieurs objets ont été déplacés dans la case, c'est le
+        dernier arrivé (celui du dessus).
+        """
+        objets = self.objets_cases.get((p[0], p[1], genre))
+        return objets[-1] if objets else None
+
+    def vide_case(self, p, refresh=True):
+        """Supprime le pion et le carré de la case p=(l,c) (voir supprime).
+
+        - p ((int, int)): position dans la grille (ligne, colonne)
+        Paramètres optionnels :
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        self._libere_case(p[0], p[1], "pion")
+        self._libere_case(p[0], p[1], "carre")
+        if refresh:
+            self._rafraichit()
+
+    def _indexe(self, o, i, j, genre):
+        """interne: Ajoute o aux objets genre de la case (i, j)."""
+        self.objets_cases.setdefault((i, j, genre), []).append(o)
+        self.cases_objets[o] = (i, j, genre)
+
+    def _desindexe(self, o):
+        """interne: Retire o de l'index des cases, s'il y est."""
+        cle = self.cases_objets.pop(o, None)
+        if cle is not None:
+            objets = self.objets_cases[cle]
+            objets.remove(o)
+            if not objets:
+                del self.objets_cases[cle]
+
+    def _libere_case(self, i, j, genre):
+        """interne: Supprime les objets genre de la case (i, j)."""
+        for o in self.objets_cases.get((i, j, genre), ())[:]:
+            self.supprime(o, refresh=False)
+
+    def _deplace_index(self, obj, i, j):
+        """interne: Met à jour l'index des cases quand obj va en (i, j).
+
+        Les objets déjà dans la case (i, j) restent affichés : obj passe
+        au-dessus d'eux dans l'index.
+        """
+        cle = self.cases_objets.get(obj)
+        if cle is None or cle[:2] == (i, j):
+            return
+        self._desindexe(obj)
+        self._indexe(obj, i, j, cle[2])
+
+    def colorie_case(
+        self, p, couleur="black", refresh=True
+    ):
+        """Colorie la case p=(l,c) dans le tampon de pixels de la fenêtre.
+
+        Contrairement à remplit_carre(), aucun objet graphique n'est créé : la
+        couleur est écrite dans le tampon, et recolorier la même case
+        réutilise la même place mémoire. Le tampon est affiché à l'écran par
+        refresh().
+        - p ((int, int)): position dans la grille (ligne, colonne)
+        Paramètres optionnels :
+        - couleur (str): couleur de la case (défaut: "black")
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        Précondition :
+        - la fenêtre a été créée avec tampon=True
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        assert self.tampon is not None, "ERREUR : fenêtre sans tampon !"
+        i, j = p
+        assert 0 <= i < self.taille[0] and 0 <= j < self.taille[1], "ERREUR : \
+coordonnées hors dimension de la fenêtre !"
+        k = 3*(i*self.taille[1]+j)
+        self.tampon[k:k+3] = _octets_rgb(couleur)
+        self.tuiles_sales[(i//self.cote_tuile)*self.tuiles_par_ligne
+                          + j//self.cote_tuile] = 1
+        if refresh:
+            self._rafraichit()
+
+    def remplit_carres(
+        self, lignes, colonnes,
+        couleurs="black",
+        refresh=True
+    ):
+        """Remplit plusieurs cases en une seule fois.
+
+        Équivalent à remplit_carre((lignes[k], colonnes[k]), couleurs[k]) pour
+        tous les k, mais les préconditions ne sont vérifiées qu'une seule fois
+        et l'affichage n'est rafraîchi qu'à la fin. Si la fenêtre a un tampon
+        de pixels, les cases y sont écrites directement (voir colorie_case),
+        sinon un carré est créé par case.
+        - lignes, colonnes (séquences d'entiers de même longueur : listes,
+            array.array ou tableaux NumPy): positions dans la grille
+        Paramètres optionnels :
+        - couleurs: une couleur pour toutes les cases (défaut: "black" ;
+            chaîne, entier 0xRRGGBB ou triplet (rouge, vert, bleu), voir
+            couleur_rgb), ou une séquence d'une couleur par case (pour 3
+            cases, un triplet d'entiers donne une couleur par case). Avec un
+            tampon et NumPy, on peut aussi donner un tableau d'octets (n, 3).
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+
+        Retourne la liste des identifiants des objets graphiques créés, ou
+        None si les cases sont écrites dans le tampon.
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        n = len(lignes)
+        assert len(colonnes) == n, "ERREUR : lignes et colonnes doivent \
+avoir la même longueur !"
+        unique = _couleur_unique(couleurs, n)
+        assert unique or len(couleurs) == n, "ERREUR : il faut autant de \
+couleurs que de cases !"
+        if n == 0:
+            return None if self.tampon is not None else []
+        if _est_numpy(lignes) or _est_numpy(colonnes):
+            # min/max de NumPy : pas de boucle python sur les éléments
+            np = sys.modules["numpy"]
+            lignes = np.asarray(lignes, dtype=np.intp)
+            colonnes = np.asarray(colonnes, dtype=np.intp)
+            bornes = (lignes.min(), lignes.max(),
+                      colonnes.min(), colonnes.max())
+        else:
+            np = None
+            bornes = (min(lignes), max(lignes), min(colonnes), max(colonnes))
+        assert 0 <= bornes[0] and bornes[1] < self.taille[0] and \
+            0 <= bornes[2] and bornes[3] < self.taille[1], "ERREUR : \
+coordonnées hors dimension de la fenêtre !"
+
+        if self.tampon is None:
+            p = self.pixels
+            if unique:
+                couleurs = [couleurs]*n
+            o = []
+            for i, j, c in zip(lignes, colonnes, couleurs):
+                self._libere_case(i, j, "carre")
+                o.append(self._recycle("rectangle",
+                                       (j*p+1, i*p+1, (j+1)*p, (i+1)*p),
+                                       width=0, fill=_couleur_tk(c)))
+                self._indexe(o[-1], i, j, "carre")
+        elif np is not None:
+            self._remplit_tampon_numpy(np, lignes, colonnes, couleurs)
+            o = None
+        else:
+            self._remplit_tampon(lignes, colonnes, couleurs)
+            o = None
+        if refresh:
+            self._rafraichit()
+        return o
+
+    def _remplit_tampon(self, lignes, colonnes, couleurs):
+        """interne: Écrit des cases dans le tampon, version python pur."""
+        tampon = self.tampon
+        sales = self.tuiles_sales
+        t = self.cote_tuile
+        n = self.tuiles_par_ligne
+        l = self.taille[1]
+        if _couleur_unique(couleurs, len(lignes)):
+            c = _octets_rgb(couleurs)
+            for i, j in zip(lignes, colonnes):
+                k = 3*(i*l+j)
+                tampon[k:k+3] = c
+                sales[(i//t)*n + j//t] = 1
+        else:
+            for i, j, couleur in zip(lignes, colonnes, couleurs):
+                k = 3*(i*l+j)
+                tampon[k:k+3] = _octets_rgb(couleur)
+                sales[(i//t)*n + j//t] = 1
+
+    def _remplit_tampon_numpy(self, np, lignes, colonnes, couleurs):
+        """interne: Écrit des cases dans le tampon, version NumPy."""
+        h, l = self.taille
+        np.frombuffer(self.tampon, dtype=np.uint8).reshape(h, l, 3)[
+            lignes, colonnes] = _valeurs_numpy(np, couleurs, len(lignes))
+        t = self.cote_tuile
+        np.frombuffer(self.tuiles_sales, dtype=np.uint8)[
+            (lignes//t)*self.tuiles_par_ligne + colonnes//t] = 1
+
+    def remplit_segments(self, segments, couleur="black", refresh=True):
+        """Remplit des segments horizontaux de cases, d'une même couleur.
+
+        Chaque segment (i, j, n) couvre les cases (i, j) à (i, j+n-1). Avec
+        un tampon de pixels, un segment est écrit en une seule copie, sinon
+        un seul rectangle est créé par segment (et non un par case).
+        - segments (itérable de triplets d'entiers): (ligne, colonne,
+            longueur) ; les segments de longueur 0 sont ignorés
+        Paramètres optionnels :
+        - couleur (str): couleur des segments (défaut: "black")
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+
+        Retourne la liste des identifiants des objets graphiques créés, ou
+        None si les segments sont écrits dans le tampon.
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        h, l = self.taille
+        tampon = self.tampon
+        if tampon is not None:
+            c = _octets_rgb(couleur)
+            o = None
+        else:
+            c = _couleur_tk(couleur)
+            p = self.pixels
+            o = []
+        for i, j, n in segments:
+            if n <= 0:
+                continue
+            assert 0 <= i < h and 0 <= j and j+n <= l, "ERREUR : \
+coordonnées hors dimension de la fenêtre !"
+            if tampon is not None:
+                k = 3*(i*l+j)
+                tampon[k:k+3*n] = c*n
+                self._marque_zone(i, j, i, j+n-1)
+            else:
+                o.append(self.create_rectangle(j*p+1, i*p+1,
+                                               (j+n)*p, (i+1)*p,
+                                               width=0, fill=c))
         if refresh:
-            self.update()
+            self._rafraichit()
+        return o
+
+    ###########################################################################
+    # tracés en lot dans le tampon de pixels                                  #
+    ###########################################################################
+    def trace_lignes(self, lignes, couleurs="black", refresh=True):
+        """Trace des segments de droite dans le tampon (Bresenham).
+
+        - lignes (séquence de (i0, j0, i1, j1), ou tableau NumPy (n, 4)):
+            cases des deux extrémités de chaque segment
+        Paramètres optionnels :
+        - couleurs (str ou séquence de str): une couleur pour tous les
+            segments (défaut: "black"), ou une couleur par segment
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        Comme pour toutes les fonctions trace_*/remplit_* en lot, aucun objet
+        graphique n'est créé, et les cases hors de la fenêtre sont ignorées.
+        Si le programme a importé NumPy, les cases de tout un lot de formes
+        sont calculées et écrites d'un coup par NumPy.
+        Précondition :
+        - la fenêtre a été créée avec tampon=True
+        """
+        np = self._numpy_formes(lignes, 4)
+        if np is not None:
+            self._trace_lignes_numpy(np, *self._formes_numpy(np, lignes,
+                                                              couleurs))
+            if refresh:
+                self._rafraichit()
+            return
+        lignes, couleurs = self._formes(lignes, couleurs)
+        tampon = self.tampon
+        h, l = self.taille
+        for (i0, j0, i1, j1), c in zip(lignes, couleurs):
+            self._marque_boite(min(i0, i1), min(j0, j1),
+                               max(i0, i1), max(j0, j1))
+            di, dj = abs(i1-i0), abs(j1-j0)
+            si = 1 if i0 < i1 else -1
+            sj = 1 if j0 < j1 else -1
+            erreur = dj - di
+            while True:
+                if 0 <= i0 < h and 0 <= j0 < l:
+                    k = 3*(i0*l+j0)
+                    tampon[k:k+3] = c
+                if i0 == i1 and j0 == j1:
+                    break
+                e = 2*erreur
+                if e > -di:
+                    erreur -= di
+                    j0 += sj
+                if e < dj:
+                    erreur += dj
+                    i0 += si
+        if refresh:
+            self._rafraichit()
+
+    def trace_cercles(self, cercles, couleurs="black", plein=False,
+                      refresh=True):
+        """Trace des cercles dans le tampon (algorithme du point milieu).
+
+        - cercles (séquence de (i, j, r), ou tableau NumPy (n, 3)): case du
+            centre et rayon (en cases) de chaque cercle
+        Paramètres optionnels :
+        - couleurs (str ou séquence de str): une couleur pour tous les
+            cercles (défaut: "black"), ou une couleur par cercle
+        - plein (bool): si True, trace des disques (défaut: False)
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        Précondition :
+        - la fenêtre a été créée avec tampon=True
+        """
+        np = self._numpy_formes(cercles, 3)
+        if np is not None:
+            self._trace_cercles_numpy(np, *self._formes_numpy(np, cercles,
+                                                               couleurs),
+                                      plein)
+            if refresh:
+                self._rafraichit()
+            return
+        cercles, couleurs = self._formes(cercles, couleurs)
+        tampon = self.tampon
+        h, l = self.taille
+        for (i, j, r), c in zip(cercles, couleurs):
+            self._marque_boite(i-r, j-r, i+r, j+r)
+            x, y, d = r, 0, 1-r
+            while y <= x:
+                if plein:
+                    self._trace_segment(i-y, j-x, j+x, c)
+                    self._trace_segment(i+y, j-x, j+x, c)
+                    self._trace_segment(i-x, j-y, j+y, c)
+                    self._trace_segment(i+x, j-y, j+y, c)
+                else:
+                    for a, b in ((y, x), (y, -x), (-y, x), (-y, -x),
+                                 (x, y), (x, -y), (-x, y), (-x, -y)):
+                        if 0 <= i+a < h and 0 <= j+b < l:
+                            k = 3*((i+a)*l+j+b)
+                            tampon[k:k+3] = c
+                y += 1
+                if d < 0:
+                    d += 2*y+1
+                else:
+                    x -= 1
+                    d += 2*(y-x)+1
+        if refresh:
+            self._rafraichit()
+
+    def remplit_rectangles(self, rectangles, couleurs="black", refresh=True):
+        """Remplit des rectangles de cases dans le tampon.
+
+        - rectangles (séquence de (i0, j0, i1, j1), ou tableau NumPy
+            (n, 4)): cases de deux coins opposés de chaque rectangle (inclus)
+        Paramètres optionnels :
+        - couleurs (str ou séquence de str): une couleur pour tous les
+            rectangles (défaut: "black"), ou une couleur par rectangle
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        Précondition :
+        - la fenêtre a été créée avec tampon=True
+        """
+        rectangles, couleurs = self._formes(rectangles, couleurs)
+        h = self.taille[0]
+        for (i0, j0, i1, j1), c in zip(rectangles, couleurs):
+            i0, i1 = min(i0, i1), max(i0, i1)
+            j0, j1 = min(j0, j1), max(j0, j1)
+            self._marque_boite(i0, j0, i1, j1)
+            for i in range(max(i0, 0), min(i1, h-1)+1):
+                self._trace_segment(i, j0, j1, c)
+        if refresh:
+            self._rafraichit()
+
+    def remplit_polygones(self, polygones, couleurs="black", refresh=True):
+        """Remplit des polygones dans le tampon (balayage ligne par ligne).
+
+        - polygones (séquence de séquences de (i, j)): sommets de chaque
+            polygone. Les sommets sont des coins de cases : le polygone
+            [(0, 0), (0, 2), (2, 2), (2, 0)] remplit les 4 cases (0, 0) à
+            (1, 1). Une case est remplie si son centre est dans le polygone
+            (règle pair-impair).
+        Paramètres optionnels :
+        - couleurs (str ou séquence de str): une couleur pour tous les
+            polygones (défaut: "black"), ou une couleur par polygone
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        Précondition :
+        - la fenêtre a été créée avec tampon=True
+        """
+        np = self._numpy_formes(polygones)
+        if np is not None:
+            self._remplit_polygones_numpy(np, polygones, couleurs)
+            if refresh:
+                self._rafraichit()
+            return
+        polygones, couleurs = self._formes(polygones, couleurs)
+        h = self.taille[0]
+        for sommets, c in zip(polygones, couleurs):
+            if _est_numpy(sommets):
+                sommets = sommets.tolist()
+            if len(sommets) < 3:
+                continue
+            aretes = list(zip(sommets, sommets[1:] + sommets[:1]))
+            lignes = [i for i, j in sommets]
+            colonnes = [j for i, j in sommets]
+            i0 = max(math.floor(min(lignes)), 0)
+            i1 = min(math.ceil(max(lignes)), h) - 1
+            self._marque_boite(i0, math.floor(min(colonnes)),
+                               i1, math.ceil(max(colonnes)))
+            for i in range(i0, i1+1):
+                # intersections de la ligne des centres avec les arêtes
+                y = i + 0.5
+                xs = sorted(ja + (y-ia)*(jb-ja)/(ib-ia)
+                            for (ia, ja), (ib, jb) in aretes
+                            if (ia <= y < ib) or (ib <= y < ia))
+                for a, b in zip(xs[0::2], xs[1::2]):
+                    self._trace_segment(i, math.ceil(a-0.5),
+                                        math.ceil(b-0.5)-1, c)
+        if refresh:
+            self._rafraichit()
+
+    def _formes(self, formes, couleurs):
+        """interne: Vérifie les préconditions d'un tracé en lot.
+
+        Renvoie la liste des formes et la liste des couleurs de chacune, en
+        octets (rouge, vert, bleu).
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        assert self.tampon is not None, "ERREUR : fenêtre sans tampon !"
+        if _est_numpy(formes):
+            formes = formes.tolist()
+        if _couleur_unique(couleurs, len(formes)):
+            return formes, [_octets_rgb(couleurs)]*len(formes)
+        if _est_numpy(couleurs):
+            couleurs = couleurs.tolist()
+        assert len(couleurs) == len(formes), "ERREUR : il faut autant de \
+couleurs que de formes !"
+        return formes, [_octets_rgb(c) for c in couleurs]
+
+    def _numpy_formes(self, formes, k=None):
+        """interne: Module NumPy pour un tracé en lot, ou None.
+
+        NumPy n'est utilisé que s'il a déjà été importé (par le programme ou
+        parce que formes est un tableau NumPy), et si chaque forme est
+        faite de k entiers (k=None : polygones).
+        """
+        np = sys.modules.get("numpy")
+        if np is None or len(formes) == 0:
+            return None
+        if k is not None and not _est_numpy(formes):
+            if len(formes[0]) != k:
+                return None
+        return np
+
+    def _formes_numpy(self, np, formes, couleurs):
+        """interne: Comme _formes, en tableaux NumPy.
+
+        Renvoie le tableau (n, k) des formes et les couleurs en octets
+        (tableau de 3 octets, ou (n, 3) pour une couleur par forme).
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        assert self.tampon is not None, "ERREUR : fenêtre sans tampon !"
+        formes = np.asarray(formes).astype(np.intp, copy=False)
+        assert _couleur_unique(couleurs, len(formes)) \
+            or len(couleurs) == len(formes), "ERREUR : il faut autant de \
+couleurs que de formes !"
+        return formes, _valeurs_numpy(np, couleurs, len(formes))
+
+    def _trace_lignes_numpy(self, np, lignes, valeurs):
+        """interne: trace_lignes, version NumPy.
+
+        Le long de l'axe où le segment est le plus long, chaque case est
+        avancée de 1 ; sur l'autre axe, la position est arrondie comme dans
+        l'algorithme de Bresenham.
+        """
+        i0, j0, i1, j1 = lignes.T
+        di, dj = np.abs(i1-i0), np.abs(j1-j0)
+        grand = np.maximum(di, dj)
+        for a, b in _par_lots(np, grand[:] + 1):
+            k, t = _deplie(np, grand[a:b] + 1)
+            k += a
+            g = np.maximum(grand[k], 1)
+            i = i0[k] + np.sign(i1-i0)[k] * ((2*t*di[k] + g - 1) // (2*g))
+            j = j0[k] + np.sign(j1-j0)[k] * ((2*t*dj[k] + g - 1) // (2*g))
+            self._ecrit_cases_numpy(np, i, j, valeurs if valeurs.ndim == 1
+                                    else valeurs[k])
+
+    def _trace_cercles_numpy(self, np, cercles, valeurs, plein):
+        """interne: trace_cercles, version NumPy.
+
+        L'algorithme du point milieu avance d'un pas pour tous les cercles
+        à la fois.
+        """
+        ci, cj, r = cercles.T
+        x, d = r.copy(), 1 - r
+        lignes, debuts, fins, numeros = [], [], [], []
+        y = 0
+        actifs = np.nonzero(y <= x)[0]
+        while len(actifs):
+            xa = x[actifs]
+            if plein:
+                cotes = ((-y, xa), (y, xa), (-xa, y), (xa, y))
+            else:
+                cotes = ((-y, xa), (y, xa), (-xa, y), (xa, y),
+                         (-y, -xa), (y, -xa), (-xa, -y), (xa, -y))
+            for a, b in cotes:
+                lignes.append(ci[actifs] + a)
+                debuts.append(cj[actifs] - b if plein else cj[actifs] + b)
+                fins.append(cj[actifs] + b)
+                numeros.append(actifs)
+            y += 1
+            negatif = d[actifs] < 0
+            x[actifs] -= ~negatif
+            d[actifs] += 2*(y - x[actifs]*~negatif) + 1
+            actifs = actifs[y <= x[actifs]]
+        # cercle par cercle, comme sans NumPy : le dernier cercle tracé
+        # recouvre les précédents
+        numeros = np.concatenate(numeros)
+        ordre = np.argsort(numeros, kind="stable")
+        self._remplit_segments_numpy(
+            np, np.concatenate(lignes)[ordre], np.concatenate(debuts)[ordre],
+            np.concatenate(fins)[ordre],
+            valeurs if valeurs.ndim == 1 else valeurs[numeros[ordre]])
+
+    def _remplit_polygones_numpy(self, np, polygones, couleurs):
+        """interne: remplit_polygones, version NumPy.
+
+        Les intersections de toutes les arêtes avec les lignes des centres
+        des cases sont calculées d'un coup, puis triées par polygone, ligne
+        et colonne : les intersections se suivent alors deux par deux, et
+        chaque paire délimite un segment à remplir (règle pair-impair).
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        assert self.tampon is not None, "ERREUR : fenêtre sans tampon !"
+        unique = _couleur_unique(couleurs, len(polygones))
+        assert unique or len(couleurs) == len(polygones), "ERREUR : il \
+faut autant de couleurs que de formes !"
+        valeurs = _valeurs_numpy(np, couleurs, len(polygones))
+        sommets = [np.asarray(p, dtype=float).reshape(-1, 2)
+                   for p in polygones]
+        gardes = [k for k, p in enumerate(sommets) if len(p) >= 3]
+        if not gardes:
+            return
+        longueurs = np.array([len(sommets[k]) for k in gardes])
+        debut, a = np.concatenate([sommets[k] for k in gardes]).T
+        # arête de chaque sommet vers le suivant (le dernier vers le premier)
+        suivant = np.arange(1, len(debut) + 1)
+        fins = np.cumsum(longueurs)
+        suivant[fins - 1] = fins - longueurs
+        fin, b = debut[suivant], a[suivant]
+        polygone = np.repeat(np.array(gardes), longueurs)
+        # lignes i telles que le centre i+0.5 est dans [min, max[ de l'arête
+        h = self.taille[0]
+        premiere = np.maximum(np.ceil(np.minimum(debut, fin) - 0.5), 0)
+        derniere = np.minimum(np.ceil(np.maximum(debut, fin) - 0.5), h) - 1
+        n = np.maximum(derniere - premiere + 1, 0).astype(np.intp)
+        k, t = _deplie(np, n)
+        i = premiere[k].astype(np.intp) + t
+        y = i + 0.5
+        x = a[k] + (y - debut[k])*(b[k] - a[k])/(fin[k] - debut[k])
+        ordre = np.lexsort((x, i, polygone[k]))
+        i, x, p = i[ordre], x[ordre], polygone[k][ordre]
+        self._remplit_segments_numpy(
+            np, i[0::2], np.ceil(x[0::2] - 0.5).astype(np.intp),
+            np.ceil(x[1::2] - 0.5).astype(np.intp) - 1,
+            valeurs if unique else valeurs[p[0::2]])
+
+    def _remplit_segments_numpy(self, np, i, j0, j1, valeurs):
+        """interne: Colorie les cases (i, j0) à (i, j1) de chaque segment.
+
+        Les segments sont coupés au bord de la fenêtre, puis toutes leurs
+        cases sont écrites par lots (voir _ecrit_cases_numpy).
+        """
+        h, l = self.taille
+        j0, j1 = np.maximum(j0, 0), np.minimum(j1, l-1)
+        gardes = (0 <= i) & (i < h) & (j0 <= j1)
+        i, j0, j1 = i[gardes], j0[gardes], j1[gardes]
+        if valeurs.ndim > 1:
+            valeurs = valeurs[gardes]
+        n = j1 - j0 + 1
+        for a, b in _par_lots(np, n):
+            k, t = _deplie(np, n[a:b])
+            k += a
+            self._ecrit_cases_numpy(np, i[k], j0[k] + t,
+                                    valeurs if valeurs.ndim == 1
+                                    else valeurs[k])
+
+    def _ecrit_cases_numpy(self, np, i, j, valeurs):
+        """interne: Écrit des cases (ignorées hors de la fenêtre), NumPy."""
+        h, l = self.taille
+        dedans = (0 <= i) & (i < h) & (0 <= j) & (j < l)
+        if not dedans.all():
+            i, j = i[dedans], j[dedans]
+            if valeurs.ndim > 1:
+                valeurs = valeurs[dedans]
+        np.frombuffer(self.tampon, dtype=np.uint8).reshape(h, l, 3)[i, j] = \
+            valeurs
+        t = self.cote_tuile
+        np.frombuffer(self.tuiles_sales, dtype=np.uint8)[
+            (i//t)*self.tuiles_par_ligne + j//t] = 1
+
+    def _trace_segment(self, i, j0, j1, c):
+        """interne: Colorie les cases (i, j0) à (i, j1) dans la fenêtre."""
+        h, l = self.taille
+        if 0 <= i < h:
+            j0, j1 = max(j0, 0), min(j1, l-1)
+            if j0 <= j1:
+                k = 3*(i*l+j0)
+                self.tampon[k:k+3*(j1-j0+1)] = c*(j1-j0+1)
+
+    def _marque_boite(self, i0, j0, i1, j1):
+        """interne: Comme _marque_zone, pour une zone qui peut déborder."""
+        i0, j0 = max(i0, 0), max(j0, 0)
+        i1, j1 = min(i1, self.taille[0]-1), min(j1, self.taille[1]-1)
+        if i0 <= i1 and j0 <= j1:
+            self._marque_zone(i0, j0, i1, j1)
+
+    def _marque_zone(self, i0, j0, i1, j1):
+        """interne: Marque à renvoyer les tuiles des cases [i0,i1]x[j0,j1]."""
+        t = self.cote_tuile
+        n = self.tuiles_par_ligne
+        for ti in range(i0//t, i1//t+1):
+            self.tuiles_sales[ti*n + j0//t:ti*n + j1//t+1] = \
+                b"\x01" * (j1//t - j0//t + 1)
+
+    def _envoie_tampon(self, tout=False):
+        """interne: Copie le tampon de pixels dans l'image affichée.
+
+        Seules les tuiles modifiées depuis le dernier envoi sont copiées (ou
+        tout le tampon si tout=True). Les tuiles voisines sur une même ligne
+        de tuiles sont regroupées en un seul rectangle, envoyé en une fois à
+        tkinter au format PPM.
+        """
+        h, l = self.taille
+        if self.hors_ecran:
+            # le canvas en mémoire lit directement le tampon
+            self.tuiles_sales[:] = bytes(len(self.tuiles_sales))
+            return
+        if tout:
+            self._envoie_rectangle(0, 0, h, l)
+            self.tuiles_sales[:] = bytes(len(self.tuiles_sales))
+            return
+        t = self.cote_tuile
+        n = self.tuiles_par_ligne
+        sales = self.tuiles_sales
+        k = sales.find(1)
+        while k >= 0:
+            # k : première tuile sale, fin : première tuile propre après k
+            # sur la même ligne de tuiles
+            ti, tj = divmod(k, n)
+            fin = sales.find(0, k, (ti+1)*n)
+            if fin < 0:
+                fin = (ti+1)*n
+            sales[k:fin] = bytes(fin-k)
+            self._envoie_rectangle(ti*t, tj*t, min((ti+1)*t, h),
+                                   min((fin-ti*n)*t, l))
+            k = sales.find(1, fin)
+
+    def _envoie_rectangle(self, i0, j0, i1, j1):
+        """interne: Copie les cases [i0,i1[x[j0,j1[ du tampon à l'écran."""
+        l = self.taille[1]
+        if j0 == 0 and j1 == l:
+            donnees = self.tampon[3*i0*l:3*i1*l]
+        else:
+            donnees = b"".join(self.tampon[3*(i*l+j0):3*(i*l+j1)]
+                               for i in range(i0, i1))
+        self.tk.call(self.image, "put",
+                     b"P6 %d %d 255 " % (j1-j0, i1-i0) + donnees,
+                     "-format", "ppm", "-to", j0, i0)
+        if self.image_affichee is not self.image:
+            p = self.pixels
+            self.tk.call(self.image_affichee, "copy", self.image,
+                         "-from", j0, i0, j1, i1,
+                         "-to", j0*p, i0*p, "-zoom", p, p)
+
+    ###########################################################################
+    # calcul parallèle des pixels du tampon                                   #
+    ###########################################################################
+    def calcule_pixels(
+        self, fonction, par_tuile=False, processus=None, periode=10
+    ):
+        """Calcule la couleur de chaque case du tampon dans d'autres processus.
+
+        La grille est découpée en tuiles de cote_tuile x cote_tuile cases,
+        calculées en parallèle (un processus par cœur par défaut). À l'écran,
+        la fonction rend la main tout de suite : chaque tuile est copiée dans
+        le tampon et affichée dès qu'elle est calculée, pendant que le
+        programme continue (par exemple dans attend_clic, qui reste réactif).
+        Hors écran, toutes les tuiles sont copiées avant de rendre la main.
+        - fonction (fonction): si par_tuile=False, fonction(ligne, colonne)
+          renvoie la couleur d'une case (chaîne "#rrggbb", nom de couleur
+          connu de couleur_rgb sans tkinter, ou entier 0xRRGGBB) ; si
+          par_tuile=True, fonction(i0, j0, i1, j1) renvoie les octets
+          (rouge, vert, bleu) des cases [i0,i1[x[j0,j1[, ligne par ligne.
+          Elle doit être définie au premier niveau d'un module (pas de
+          lambda), pour pouvoir être envoyée aux autres processus.
+        Paramètres optionnels :
+        - par_tuile (bool): voir fonction (défaut: False)
+        - processus (int): nombre de processus (défaut: nombre de cœurs)
+        - periode (int): intervalle de réception des tuiles à l'écran, en
+          millisecondes (défaut: 10)
+        Précondition :
+        - la fenêtre a été créée avec tampon=True
+        Un calcul précédent encore en cours est arrêté (voir arrete_calcul).
+        Si le calcul d'une tuile échoue à l'écran, le calcul est arrêté et
+        son exception est levée par le prochain appel de attend_calcul,
+        refresh ou attend_clic.
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        assert self.tampon is not None, "ERREUR : fenêtre sans tampon !"
+        import concurrent.futures
+        self.arrete_calcul()
+        h, l = self.taille
+        t = self.cote_tuile
+        self.executeur = concurrent.futures.ProcessPoolExecutor(processus)
+        self.tuiles_attendues = [
+            self.executeur.submit(_calcule_tuile, fonction, par_tuile,
+                                  i0, j0, min(i0+t, h), min(j0+t, l))
+            for i0 in range(0, h, t) for j0 in range(0, l, t)]
+        if self.hors_ecran:
+            try:
+                for tuile in concurrent.futures.as_completed(
+                        self.tuiles_attendues):
+                    self._copie_tuile(*tuile.result())
+            finally:
+                # même si une tuile a échoué : les processus sont arrêtés
+                self.arrete_calcul()
+            self.refresh()
+        else:
+            self._recoit_tuiles(periode)
+
+    def attend_calcul(self):
+        """Attend la fin du calcul lancé par calcule_pixels, et l'affiche.
+
+        Pendant l'attente, la fenêtre ne réagit plus aux événements.
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        import concurrent.futures
+        concurrent.futures.wait(self.tuiles_attendues)
+        if self.idd_calcul is not None:
+            self.root.after_cancel(self.idd_calcul)
+        self._recoit_tuiles()
+        self._signale_erreur_calcul()
+
+    def arrete_calcul(self):
+        """Arrête le calcul lancé par calcule_pixels (s'il est en cours).
+
+        Les tuiles déjà copiées restent dans le tampon.
+        """
+        if self.idd_calcul is not None:
+            if self.root is not None:
+                self.root.after_cancel(self.idd_calcul)
+            self.idd_calcul = None
+        if self.executeur is not None:
+            self.executeur.shutdown(wait=False, cancel_futures=True)
+            self.executeur = None
+        self.tuiles_attendues = []
+
+    def _recoit_tuiles(self, periode=None):
+        """interne: Copie et affiche les tuiles calculées.
+
+        Se relance toutes les periode millisecondes (timer tk) tant que des
+        tuiles sont attendues, si periode n'est pas None.
+        """
+        self.idd_calcul = None
+        if self.root is None or self.executeur is None:
+            return
+        attendues = []
+        for tuile in self.tuiles_attendues:
+            if not tuile.done():
+                attendues.append(tuile)
+            elif tuile.exception() is not None:
+                # pas de raise ici : tkinter ignorerait l'exception levée
+                # dans un timer, elle est relancée hors du timer
+                self.arrete_calcul()
+                self.erreur_calcul = tuile.exception()
+                self._reveille()
+                return
+            else:
+                self._copie_tuile(*tuile.result())
+        self.tuiles_attendues = attendues
+        if not attendues:
+            self.arrete_calcul()
+            self.refresh()
+            return
+        self._rafraichit()
+        if periode is not None:
+            self.idd_calcul = self.root.after(periode, self._recoit_tuiles,
+                                              periode)
+
+    def _signale_erreur_calcul(self):
+        """interne: Relance l'exception d'une tuile (voir _recoit_tuiles)."""
+        erreur = self.erreur_calcul
+        if erreur is not None:
+            self.erreur_calcul = None
+            raise erreur
+
+    def _copie_tuile(self, i0, j0, i1, j1, donnees):
+        """interne: Copie les cases calculées [i0,i1[x[j0,j1[ au tampon."""
+        l = self.taille[1]
+        largeur = 3*(j1-j0)
+        for i in range(i0, i1):
+            k = 3*(i*l+j0)
+            self.tampon[k:k+largeur] = \
+                donnees[(i-i0)*largeur:(i-i0+1)*largeur]
+        self._marque_zone(i0, j0, i1-1, j1-1)
+
+    ###########################################################################
+    # tampon partagé avec un autre processus                                  #
+    ###########################################################################
+    def partage_tampon(self):
+        """Partage le tampon de pixels avec un autre processus.
+
+        Crée une mémoire partagée (multiprocessing.shared_memory) dans
+        laquelle un autre processus dessine avec la classe producteur, sans
+        aucune copie ni communication par pixel. À chaque refresh(), la
+        dernière image complète publiée par le producteur (voir
+        producteur.publie) remplace tout le tampon. La mémoire partagée est
+        détruite à la fermeture de la fenêtre.
+        Précondition :
+        - la fenêtre a été créée avec tampon=True
+
+        Retourne le nom de la mémoire partagée (str), à donner au producteur.
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        assert self.tampon is not None, "ERREUR : fenêtre sans tampon !"
+        if self.memoire_partagee is None:
+            from multiprocessing import shared_memory
+            n = len(self.tampon)
+            memoire = shared_memory.SharedMemory(
+                create=True, size=_DEBUT_PARTAGE + 2*n)
+            _ENTIERS_PARTAGES.pack_into(memoire.buf, 0, 0, 0,
+                                        self.taille[0], self.taille[1])
+            # les deux images commencent avec le contenu du tampon
+            memoire.buf[_DEBUT_PARTAGE:_DEBUT_PARTAGE+n] = self.tampon
+            memoire.buf[_DEBUT_PARTAGE+n:_DEBUT_PARTAGE+2*n] = self.tampon
+            self.memoire_partagee = memoire
+            self.sequence_partagee = 0
+        return self.memoire_partagee.name
+
+    def _lit_tampon_partage(self):
+        """interne: Copie dans le tampon la dernière image publiée.
+
+        Le producteur écrit dans une image pendant que l'autre est affichée,
+        puis publie la sienne en changeant l'image affichée et en augmentant
+        le numéro d'image. Si le numéro change pendant la copie, le
+        producteur a pu recommencer à écrire dans l'image copiée : la copie
+        est recommencée. Après 100 essais, l'image précédente est gardée, et
+        la lecture sera retentée au prochain refresh : une image à moitié
+        écrite n'est jamais affichée.
+        """
+        memoire = self.memoire_partagee.buf
+        n = len(self.tampon)
+        for essai in range(100):
+            sequence, = _ENTIER_PARTAGE.unpack_from(memoire, 0)
+            if sequence == self.sequence_partagee:
+                return
+            affichee, = _ENTIER_PARTAGE.unpack_from(memoire, 8)
+            debut = _DEBUT_PARTAGE + affichee*n
+            image = bytes(memoire[debut:debut+n])
+            if _ENTIER_PARTAGE.unpack_from(memoire, 0)[0] == sequence:
+                break
+        else:
+            return
+        self.tampon[:] = image
+        self.sequence_partagee = sequence
+        self._marque_zone(0, 0, self.taille[0]-1, self.taille[1]-1)
+
+    ###########################################################################
+    # vue sur une grille virtuelle plus grande que la fenêtre                 #
+    ###########################################################################
+
+    # touches de déplacement de la vue : (lignes, colonnes) en quarts de vue
+    touches_vue = {"Up": (-1, 0), "Down": (1, 0),
+                   "Left": (0, -1), "Right": (0, 1)}
+    # touches de zoom : variation du niveau de zoom
+    touches_zoom = {"plus": -1, "KP_Add": -1, "equal": -1,
+                    "minus": 1, "KP_Subtract": 1}
+
+    def affiche_grille(self, grille, origine=(0, 0), niveau=0,
+                       refresh=True):
+        """Fait de la fenêtre une vue sur une grille virtuelle.
+
+        La fenêtre montre une partie de la grille (grille_virtuelle), qui
+        peut être beaucoup plus grande qu'elle : seules les cases visibles
+        sont copiées dans le tampon de la fenêtre. Au niveau de zoom n,
+        chaque case de la fenêtre montre une case sur 2**n de la grille,
+        prise dans des tuiles réduites gardées en cache par la grille.
+        Ensuite, attend_clic déplace la vue (flèches, ou clic droit pour
+        centrer la vue sur une case) et zoome (+ et -, ou molette autour de
+        la case pointée), et refresh() réaffiche la vue si la grille a été
+        modifiée.
+        - grille (grille_virtuelle): grille à afficher (None pour arrêter)
+        Paramètres optionnels :
+        - origine ((int, int)): case de la grille en haut à gauche de la vue
+          (défaut: (0, 0))
+        - niveau (int): niveau de zoom (défaut: 0, une case de la grille
+          par case de la fenêtre)
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        Précondition :
+        - la fenêtre a été créée avec tampon=True
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        assert self.tampon is not None, "ERREUR : fenêtre sans tampon !"
+        self.grille = grille
+        if grille is not None:
+            self.deplace_vue(origine, niveau, refresh)
+
+    def deplace_vue(self, origine=None, niveau=None, refresh=True):
+        """Déplace la vue sur la grille virtuelle (voir affiche_grille).
+
+        Paramètres optionnels :
+        - origine ((int, int)): case de la grille en haut à gauche de la vue
+          (défaut: inchangée)
+        - niveau (int): niveau de zoom (défaut: inchangé)
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        La vue est ramenée dans la grille si besoin, et son origine alignée
+        sur un multiple de 2**niveau.
+        """
+        assert self.grille is not None, "ERREUR : aucune grille affichée !"
+        h, l = self.taille
+        hg, lg = self.grille.taille
+        if niveau is None:
+            niveau = self.niveau_vue
+        if origine is None:
+            origine = self.origine_vue
+        # au plus le niveau où toute la grille tient dans la fenêtre
+        niveau_max = 0
+        while (hg-1) >> niveau_max >= h or (lg-1) >> niveau_max >= l:
+            niveau_max += 1
+        niveau = min(max(niveau, 0), niveau_max)
+        i = min(origine[0], hg - (h << niveau))
+        j = min(origine[1], lg - (l << niveau))
+        self.origine_vue = (max(i, 0) >> niveau << niveau,
+                            max(j, 0) >> niveau << niveau)
+        self.niveau_vue = niveau
+        self._affiche_vue()
+        if refresh:
+            self._rafraichit()
+
+    def case_grille(self, p):
+        """Renvoie la case de la grille virtuelle montrée en case p=(l,c)."""
+        n = self.niveau_vue
+        hg, lg = self.grille.taille
+        return (min(self.origine_vue[0] + (p[0] << n), hg-1),
+                min(self.origine_vue[1] + (p[1] << n), lg-1))
+
+    def _attend_clic_grille(self, delai):
+        """interne: attend_clic sur une grille virtuelle."""
+        fin = None if delai is None else time.monotonic() + delai/1000
+        while True:
+            if fin is not None:
+                delai = max(int(1000*(fin - time.monotonic())), 0)
+            r = self._attend_evenement(delai)
+            if r is None or self.grille is None:
+                return r
+            r = self._traduit_grille(r)
+            if r is not None:
+                return r
+
+    def _traduit_grille(self, r):
+        """interne: Traduit l'événement r pour la grille virtuelle affichée.
+
+        Les clics et les déplacements de la souris sont traduits en cases de
+        la grille. Les flèches, les touches de zoom, le clic droit et la
+        molette (événements "vue") déplacent la vue, et renvoient None
+        (l'événement ne doit pas être renvoyé).
+        """
+        if r[0] in ("clic", "souris"):
+            return (r[0], self.case_grille(r[1]))
+        n = self.niveau_vue
+        i, j = self.origine_vue
+        h, l = self.taille
+        if r[0] == "vue":
+            p, q, zoom = r[1]
+            ci, cj = self.case_grille((p, q))
+            if zoom is None:
+                # centre la vue sur la case cliquée
+                self.deplace_vue((ci - (h << n)//2, cj - (l << n)//2))
+            elif zoom:
+                # zoome en gardant la case pointée sous la souris
+                m = min(max(n + zoom, 0), 62)
+                self.deplace_vue((ci - (p << m), cj - (q << m)), m)
+            return None
+        if r[0] != "touche":
+            return r
+        if r[1] in self.touches_vue:
+            di, dj = self.touches_vue[r[1]]
+            self.deplace_vue((i + di*max(h//4, 1 << n),
+                              j + dj*max(l//4, 1 << n)))
+        elif r[1] in self.touches_zoom:
+            # zoome autour du centre de la vue
+            m = min(max(n + self.touches_zoom[r[1]], 0), 62)
+            ci, cj = i + (h << n)//2, j + (l << n)//2
+            self.deplace_vue((ci - (h << m)//2, cj - (l << m)//2), m)
+        else:
+            return r
+        return None
+
+    def _affiche_vue(self):
+        """interne: Copie dans le tampon les cases visibles de la grille."""
+        grille = self.grille
+        n = self.niveau_vue
+        t = grille.cote_tuile
+        h, l = self.taille
+        # origine de la vue en cases du niveau n
+        oi, oj = self.origine_vue[0] >> n, self.origine_vue[1] >> n
+        fond = _octets_rgb(grille.fond)
+        tampon = self.tampon
+        for ti in range(oi//t, (oi+h-1)//t + 1):
+            for tj in range(oj//t, (oj+l-1)//t + 1):
+                tuile = grille._tuile(n, ti, tj)
+                a0, a1 = max(ti*t, oi), min((ti+1)*t, oi+h)
+                b0, b1 = max(tj*t, oj), min((tj+1)*t, oj+l)
+                largeur = 3*(b1-b0)
+                vide = fond*(b1-b0)
+                for a in range(a0, a1):
+                    k = 3*((a-oi)*l + b0-oj)
+                    if tuile is None:
+                        tampon[k:k+largeur] = vide
+                    else:
+                        d = 3*((a-ti*t)*t + b0-tj*t)
+                        tampon[k:k+largeur] = tuile[d:d+largeur]
+        self._marque_zone(0, 0, h-1, l-1)
+        self.version_grille = grille.version
 
     ###########################################################################
     # interface de bas niveau :                                               #
@@ -482,9 +2311,9 @@ coordonnées hors dimension de la fenêtre !"
         """
         assert self.root, "ERREUR : fenêtre fermée !"
         o = self.create_line(x1[1]+1, x1[0]+1, x2[1]+1, x2[0]+1,
-                             width=epaisseur, fill=couleur)
+                             width=epaisseur, fill=_couleur_tk(couleur))
         if refresh:
-            self.update()
+            self._rafraichit()
         return o
 
     def affiche_cercle(
@@ -504,14 +2333,14 @@ coordonnées hors dimension de la fenêtre !"
         """
         assert self.root, "ERREUR : fenêtre fermée !"
         o = self.create_oval(x1[1]+1, x1[0]+1, x2[1]+1, x2[0]+1,
-                             width=contour, fill=couleur)
+                             width=contour, fill=_couleur_tk(couleur))
         if refresh:
-            self.update()
+            self._rafraichit()
         return o
 
     def affiche_texte(
         self, position, texte,
-        couleur="black", fontsize=11, refresh=True
+        couleur="black", fontsize=11, refresh=True, police="Purisa"
     ):
         """Affiche un texte centré à une certaine position (pixels).
 
@@ -522,18 +2351,60 @@ coordonnées hors dimension de la fenêtre !"
         - couleur (str): couleur (défaut: "black")
         - fontsize (int): taille du texte (défaut: 11pt)
         - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        - police (str): famille de la police (défaut: "Purisa")
 
-        Retourne l'identifiant de l'objet graphique créé (int).
+        Retourne l'identifiant de l'objet graphique créé (int), que
+        modifie_texte peut changer sans le recréer.
         """
         assert self.root, "ERREUR : fenêtre fermée !"
-        o = self.create_text(position[1]+1, position[0]+1,
-                             text=texte,
-                             font=("Purisa", fontsize),
-                             fill=couleur)
+        o = self._recycle("text", (position[1]+1, position[0]+1),
+                          text=texte,
+                          font=self._police(police, fontsize),
+                          fill=_couleur_tk(couleur))
         if refresh:
-            self.update()
+            self._rafraichit()
         return o
 
+    def modifie_texte(
+        self, obj, texte=None, couleur=None, refresh=True
+    ):
+        """Change le texte et/ou la couleur d'un texte déjà affiché.
+
+        Plus rapide que supprime suivi de affiche_texte pour un texte qui
+        change souvent (score, message...) : l'objet est modifié sur place.
+        Paramètres :
+        - obj (int): identifiant du texte (retourné par affiche_texte)
+        Paramètres optionnels :
+        - texte (str): nouveau texte (défaut: inchangé)
+        - couleur (str): nouvelle couleur (défaut: inchangée)
+        - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        assert self.type(obj) == "text", "ERREUR : obj n'est pas un texte !"
+        options = {}
+        if texte is not None:
+            options["text"] = texte
+        if couleur is not None:
+            options["fill"] = _couleur_tk(couleur)
+        if options:
+            self.itemconfigure(obj, **options)
+            if refresh:
+                self._rafraichit()
+
+    def _police(self, famille, taille):
+        """interne: Police (famille, taille), créée une seule fois."""
+        cle = (famille, taille)
+        police = self.polices.get(cle)
+        if police is None:
+            if self.hors_ecran:
+                police = cle
+            else:
+                import tkinter.font
+                police = tkinter.font.Font(root=self.root, family=famille,
+                                           size=taille)
+            self.polices[cle] = police
+        return police
+
     def arriere_plan(
         self, obj, derriere=1, refresh=True
     ):
@@ -550,7 +2421,7 @@ coordonnées hors dimension de la fenêtre !"
         # se met en fond, derrière l'objet 'derriere':
         self.tag_lower(obj, derriere)
         if refresh:
-            self.update()
+            self._rafraichit()
 
     def refresh(
         self
@@ -561,24 +2432,233 @@ coordonnées hors dimension de la fenêtre !"
         argument de la fonction de création "refresh=False", puis appeler cette
         fonction une seule fois ensuite. Cela accélère l'affichage de manière
         significative lorsque de nombreux objets graphiques sont créés.
+        Avec "refresh=True", les fonctions d'affichage regroupent d'elles-mêmes
+        leurs rafraichissements (au plus ips_max par seconde, voir
+        _rafraichit) ; cette fonction rafraichit immédiatement, par exemple
+        avant une pause (time.sleep) pendant laquelle tkinter ne tourne pas.
+        Si la fenêtre a un tampon de pixels, il est affiché à ce moment (avec
+        la dernière image complète publiée par un autre processus, voir
+        partage_tampon).
         """
         assert self.root, "ERREUR : fenêtre fermée !"
+        self._signale_erreur_calcul()
+        self._annule_rafraichissement()
+        if self.ips_max:
+            self.prochain_rafraichissement = time.monotonic() \
+                + 1/self.ips_max
+        if self.memoire_partagee is not None:
+            self._lit_tampon_partage()
+        if self.grille is not None \
+                and self.grille.version != self.version_grille:
+            self._affiche_vue()
+        if self.tampon is not None:
+            self._envoie_tampon()
         self.update()
+        if self.enregistreur is not None:
+            self.enregistreur.ajoute(self._image_rgb()[2])
+
+    def _rafraichit(self):
+        """interne: Rafraichit la fenêtre, au plus ips_max fois par seconde.
+
+        Appelée par les fonctions d'affichage avec refresh=True. Si le
+        dernier rafraichissement date de moins de 1/ips_max seconde, il est
+        remis à la fin de cet intervalle (timer tk, ou prochain attend_clic
+        hors écran), et les demandes suivantes s'y regroupent.
+        """
+        if not self.ips_max \
+                or time.monotonic() >= self.prochain_rafraichissement:
+            self.refresh()
+        elif self.rafraichissement_prevu is None:
+            if self.hors_ecran:
+                self.rafraichissement_prevu = True
+            else:
+                attente = self.prochain_rafraichissement - time.monotonic()
+                self.rafraichissement_prevu = self.root.after(
+                    max(int(1000*attente)+1, 1), self._rafraichit_prevu)
+
+    def _rafraichit_prevu(self):
+        """interne: Effectue le rafraichissement remis par _rafraichit."""
+        self.rafraichissement_prevu = None
+        # une erreur de calcul attend d'être relancée hors du timer tk
+        if self.root is not None and self.erreur_calcul is None:
+            self.refresh()
+
+    def _annule_rafraichissement(self):
+        """interne: Annule le rafraichissement remis par _rafraichit."""
+        prevu = self.rafraichissement_prevu
+        self.rafraichissement_prevu = None
+        if prevu is not None and prevu is not True:
+            self.root.after_cancel(prevu)
+
+    def update(self):
+        """Met à jour l'affichage tkinter (voir refresh).
+
+        Crée la grille de départ si c'est le premier affichage.
+        """
+        if self._mise_en_place_attendue is not None:
+            self._mise_en_place()
+        self.canevas.update()
+
+    def exporte(self, nom_fichier):
+        """Enregistre le contenu de la fenêtre dans un fichier image.
+
+        - nom_fichier (str): nom du fichier, terminé par ".png" ou ".ppm"
+          selon le format voulu.
+        Tous les objets graphiques sont dessinés (sauf les textes), sur
+        le tampon de pixels s'il y en a un.
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        largeur, hauteur, pixels = self._image_rgb()
+        if nom_fichier.lower().endswith(".png"):
+            donnees = _code_png(largeur, hauteur, pixels)
+        else:
+            assert nom_fichier.lower().endswith(".ppm"), "ERREUR : le nom \
+du fichier doit se terminer par .png ou .ppm !"
+            donnees = b"P6 %d %d 255\n" % (largeur, hauteur) + pixels
+        with open(nom_fichier, "wb") as f:
+            f.write(donnees)
+
+    def enregistre(self, nom_fichier, ips=25):
+        """Enregistre les images affichées par refresh() dans un fichier.
+
+        Chaque appel de refresh() ajoute une image au fichier, qui est écrit
+        au fur et à mesure. Les images identiques successives ne sont écrites
+        qu'une fois (dans une animation APNG, la précédente dure plus
+        longtemps).
+        - nom_fichier (str): nom du fichier, terminé par ".png" (animation
+          APNG) ou ".ppm" (suite d'images PPM)
+        Paramètres optionnels :
+        - ips (int): nombre d'images par seconde (défaut: 25)
+        L'enregistrement se termine avec arrete_enregistrement() ou à la
+        fermeture de la fenêtre. Comme pour exporte(), les textes ne sont
+        pas dessinés.
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        self.arrete_enregistrement()
+        self.enregistreur = _enregistreur(
+            nom_fichier, self.taille[1]*self.pixels,
+            self.taille[0]*self.pixels, ips)
+
+    def arrete_enregistrement(self):
+        """Termine l'enregistrement commencé par enregistre().
+
+        Si aucun refresh() n'a eu lieu depuis enregistre(), l'image actuelle
+        est enregistrée : le fichier contient toujours au moins une image.
+        """
+        if self.enregistreur is not None:
+            if self.enregistreur.derniere is None:
+                self.enregistreur.ajoute(self._image_rgb()[2])
+            self.enregistreur.ferme()
+            self.enregistreur = None
+
+    def _image_rgb(self):
+        """interne: Renvoie (largeur, hauteur, pixels) de l'image affichée.
+
+        pixels contient 3 octets (rouge, vert, bleu) par pixel, ligne par
+        ligne.
+        """
+        if self._mise_en_place_attendue is not None:
+            self._mise_en_place()
+        h, l = self.taille[0]*self.pixels, self.taille[1]*self.pixels
+        if self.hors_ecran:
+            return l, h, bytes(self.canevas.rendu())
+        return l, h, bytes(self._copie_canevas().rendu())
+
+    # options des objets tkinter recopiées par _copie_canevas
+    _options_copiees = {"line": ("fill", "width", "state"),
+                        "rectangle": ("fill", "outline", "width", "state"),
+                        "oval": ("fill", "outline", "width", "state")}
+
+    def _copie_canevas(self):
+        """interne: Copie les objets du canvas tkinter dans un canvas en
+        mémoire (voir _canevas_memoire), qui sait les dessiner.
+
+        L'image du tampon de pixels est copiée avec le tampon lui-même ; les
+        textes et les autres images ne sont pas copiés.
+        """
+        copie = _canevas_memoire(self.taille[0]*self.pixels,
+                                 self.taille[1]*self.pixels,
+                                 self.couleur_fond)
+        canevas = self.canevas
+        for o in canevas.find_all():
+            genre = canevas.type(o)
+            if genre == "image":
+                if self.tampon is None or str(canevas.itemcget(
+                        o, "image")) != str(self.image_affichee):
+                    continue
+                options = {"image": _image_tampon(
+                    self.tampon, self.taille, self.pixels),
+                    "state": canevas.itemcget(o, "state")}
+            elif genre in self._options_copiees:
+                options = {k: canevas.itemcget(o, k)
+                           for k in self._options_copiees[genre]}
+            else:
+                continue
+            copie._cree(genre, canevas.coords(o), options)
+        return copie
 
     def supprime(
         self, obj, refresh=True
     ):
         """Supprime l'objet graphique obj.
 
-        - obj (int): identifiant de l'objet (retourné par une fonction de
-                     création)
+        Les pions, carrés et textes ne sont pas détruits mais cachés, et
+        réutilisés par les prochains affichages (voir _recycle), dans la
+        limite de taille_reserve objets cachés par type.
+        - obj (int ou str): identifiant de l'objet (retourné par une
+                     fonction de création), ou tag ("all" : tous les objets)
         Arguments optionnels :
         - refresh (bool): faire le rafraichissement de fenêtre (défaut: True)
         """
         assert self.root, "ERREUR : fenêtre fermée !"
-        self.delete(obj)
+        objets = self.find_withtag(obj)
+        if not isinstance(obj, str) and obj not in objets:
+            # objet déjà détruit (par exemple par delete) : on l'oublie
+            self._oublie(obj)
+        for o in objets:
+            genre = self.types_objets.get(o)
+            reserve = None if genre is None \
+                else self.reserve.setdefault(genre, {})
+            if reserve is not None and len(reserve) < self.taille_reserve:
+                self._desindexe(o)
+                del self.types_objets[o]
+                self.itemconfigure(o, state="hidden")
+                reserve[o] = None
+            else:
+                # o ne doit plus être réutilisé s'il était caché
+                self._oublie(o)
+                self.delete(o)
         if refresh:
-            self.update()
+            self._rafraichit()
+
+    def _oublie(self, o):
+        """interne: Oublie o (index des cases, objets réutilisables)."""
+        self._desindexe(o)
+        self.types_objets.pop(o, None)
+        for reserve in self.reserve.values():
+            reserve.pop(o, None)
+
+    def _recycle(self, genre, coords, **options):
+        """interne: Affiche un objet de type genre, de préférence caché.
+
+        Un objet caché par supprime est replacé (coords), reconfiguré
+        (itemconfigure) et remis au premier plan, sinon un nouvel objet est
+        créé. Renvoie son identifiant.
+        """
+        reserve = self.reserve.get(genre)
+        while reserve:
+            o = reserve.popitem()[0]
+            if self.type(o) == genre:
+                self.coords(o, *coords)
+                self.itemconfigure(o, state="normal", tags="", **options)
+                self.tag_raise(o)
+                break
+            # objet détruit depuis qu'il a été caché (par delete)
+            self._oublie(o)
+        else:
+            o = getattr(self, "create_" + genre)(*coords, **options)
+        self.types_objets[o] = genre
+        return o
 
     ###########################################################################
     # fonction unique d'attente d'entrée/sortie                               #
@@ -601,12 +2681,35 @@ coordonnées hors dimension de la fenêtre !"
             ("FIN", None)
         - si le délai expire, la valeur
             None
+        Hors écran, aucun utilisateur ne peut interagir : les événements
+        déjà dans la queue sont renvoyés, puis le délai expire immédiatement
+        (ou la fenêtre est considérée fermée s'il n'y a pas de délai).
+        Si la fenêtre affiche une grille virtuelle (voir affiche_grille), les
+        flèches et le clic droit déplacent la vue, les touches + et - et la
+        molette zooment, sans être renvoyés, et les clics (comme les
+        déplacements de la souris, voir suit_souris) donnent les coordonnées
+        dans la grille.
         """
+        if self.grille is not None:
+            return self._attend_clic_grille(delai)
+        return self._attend_evenement(delai)
+
+    def _attend_evenement(self, delai):
+        """interne: Attend le prochain événement (voir attend_clic)."""
+        if self._mise_en_place_attendue is not None:
+            self._mise_en_place()
+        if self.hors_ecran:
+            if self.rafraichissement_prevu is not None:
+                self._rafraichit_prevu()
+            if not self.eventq.empty():
+                return self.eventq.get(False)
+            return None if delai is not None else ("FIN", None)
+
         # privée : fonction appelée si expiration du délai d'attente
         def delai_expire():
             self.eventq.put(None)
             self.idd = None
-            self.root.quit()
+            self._reveille()
 
         # identifiant du timer armé ici
         self.idd = None
@@ -614,26 +2717,98 @@ coordonnées hors dimension de la fenêtre !"
             assert self.root, "ERREUR : fenêtre fermée !"
             self.idd = self.root.after(delai, delai_expire)
         # ceci est la boucle d'attente principale de l'interface Tk().
-        # elle checke les événements de la fenêtre et sort si un événement se
-        # produit.
+        # elle traite les événements de la fenêtre et sort dès que l'un d'eux
+        # a mis quelque chose dans la queue.
         while True:
+            # une tuile de calcule_pixels a échoué (voir _recoit_tuiles)
+            if self.erreur_calcul is not None:
+                if self.idd is not None and self.root is not None:
+                    self.root.after_cancel(self.idd)
+                self._signale_erreur_calcul()
             ####################
-            try:
-                # l'event queue est remplie par les événements graphiques
+            # l'event queue est remplie par les événements graphiques
+            if not self.eventq.empty():
                 r = self.eventq.get(False)
                 # annule le timer lancé ci-dessus
                 if self.idd is not None and self.root is not None:
                     self.root.after_cancel(self.idd)
                 return r
-            except queue.Empty:
-                # aucun événement à traiter, on passe à mainloop
-                pass
+            # aucun événement à traiter, on attend le suivant
             ####################
             assert self.root, "ERREUR : fenêtre fermée !"
-            # mainloop s'arrête si un événement se produit
-            self.root.mainloop()
+            # tk dort jusqu'au prochain événement, et rend la main dès que
+            # signal est modifié (par _reveille)
+            try:
+                self.wait_variable(self.signal)
+            except tk.TclError:
+                # la fenêtre a été détruite pendant l'attente
+                pass
             ####################
 
+    async def attend_clic_async(self, delai=None, periode=10):
+        """Version asynchrone (asyncio) de attend_clic.
+
+        S'utilise avec "await fenetre.attend_clic_async()" dans une coroutine :
+        pendant l'attente, les autres tâches asyncio continuent de s'exécuter.
+        Les événements tkinter sont traités toutes les periode millisecondes.
+        Paramètres optionnels :
+        - delai (int): le délai d'attente (par défaut, attend indéfiniment) en
+          millisecondes
+        - periode (int): intervalle de traitement des événements tkinter, en
+          millisecondes (défaut: 10)
+
+        Renvoie les mêmes valeurs que attend_clic.
+        """
+        import asyncio
+        if self.hors_ecran:
+            return self.attend_clic(delai)
+        fin = None if delai is None else time.monotonic() + delai/1000
+        while True:
+            self._signale_erreur_calcul()
+            if not self.eventq.empty():
+                r = self.eventq.get(False)
+                if self.grille is not None:
+                    # même traduction que attend_clic (voir affiche_grille)
+                    r = self._traduit_grille(r)
+                    if r is None:
+                        continue
+                return r
+            if fin is not None and time.monotonic() >= fin:
+                return None
+            assert self.root, "ERREUR : fenêtre fermée !"
+            # traite les événements tk en attente, sans bloquer
+            try:
+                self.update()
+            except tk.TclError:
+                # la fenêtre a été détruite pendant le traitement
+                pass
+            if self.eventq.empty():
+                # rend la main aux autres tâches asyncio
+                await asyncio.sleep(periode/1000)
+
+    async def evenements(self, periode=10):
+        """Flux asynchrone des événements de la fenêtre.
+
+        S'utilise dans une coroutine avec :
+            async for evenement in fenetre.evenements():
+                ...
+        Chaque événement a la forme renvoyée par attend_clic. Le flux se
+        termine après l'événement ("FIN", None) (fermeture de la fenêtre).
+        Paramètre optionnel :
+        - periode (int): intervalle de traitement des événements tkinter, en
+          millisecondes (défaut: 10)
+        """
+        while True:
+            evenement = await self.attend_clic_async(periode=periode)
+            yield evenement
+            if evenement[0] == "FIN":
+                return
+
+    def _reveille(self):
+        """interne: Réveille attend_clic après l'ajout d'un événement."""
+        if self.root is not None and not self.hors_ecran:
+            self.signal.set(1)
+
     def position_souris(self):
         """Renvoie la position de la souris dans la fenêtre.
 
@@ -642,17 +2817,900 @@ coordonnées hors dimension de la fenêtre !"
         si une coordonnée est négative ou supérieure au max, la souris est
         sortie de la fenêtre.
         """
-        def motion(event):
-            self.souris = (event.y, event.x)
-
         assert self.root, "ERREUR : fenêtre fermée !"
         self.refresh()
-        try:
-            return self.souris
-        except AttributeError:
+        self._lie_souris()
+        return self.souris
+
+    def suit_souris(self, actif=True):
+        """Signale (ou non) les déplacements de la souris à attend_clic.
+
+        Une fois activé, attend_clic renvoie aussi ("souris", (ligne,
+        colonne)) quand la souris passe sur une case. Les déplacements
+        successifs pas encore lus sont regroupés : seul le dernier est gardé.
+        Paramètre optionnel :
+        - actif (bool): activer (défaut: True) ou désactiver
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        self.souris_suivie = actif
+        self._lie_souris()
+
+    def _lie_souris(self):
+        """interne: Suit la souris, une seule fois par fenêtre."""
+        # privée: appelée quand la souris bouge dans le canvas
+        def motion(evenement):
+            self.souris = (evenement.y, evenement.x)
+            if self.souris_suivie:
+                i = min(max((evenement.y-1)//self.pixels, 0),
+                        self.taille[0]-1)
+                j = min(max((evenement.x-1)//self.pixels, 0),
+                        self.taille[1]-1)
+                self.eventq.put(("souris", (i, j)))
+                self._reveille()
+
+        if not self.souris_liee:
             self.bind("<Motion>", motion)
-            self.souris = (0, 0)
-            return self.souris
+            self.souris_liee = True
+
+    def attend_evenements(self, max_n=None, delai=None):
+        """Attend un événement, puis renvoie tous ceux qui sont en attente.
+
+        Paramètres optionnels :
+        - max_n (int): nombre maximal d'événements renvoyés (défaut: tous)
+        - delai (int): le délai d'attente du premier événement (par défaut,
+          attend indéfiniment) en millisecondes
+
+        Renvoie la liste des événements (de la forme renvoyée par
+        attend_clic, sans None), vide si le délai expire. La liste s'arrête
+        après ("FIN", None).
+        """
+        assert max_n is None or max_n > 0, "ERREUR : max_n doit être \
+positif !"
+        evenements = []
+        r = self.attend_clic(delai)
+        if r is not None and not self.hors_ecran and self.root is not None:
+            # traite les événements qui attendent encore dans tk, pour qu'ils
+            # soient dans la queue et renvoyés dans le même lot
+            try:
+                self.update()
+            except tk.TclError:
+                # la fenêtre a été détruite pendant le traitement
+                pass
+        while r is not None:
+            evenements.append(r)
+            if r[0] == "FIN" or len(evenements) == max_n \
+                    or self.eventq.empty():
+                break
+            r = self.attend_clic(0)
+        return evenements
+
+    ###########################################################################
+    # mesures de performances (désactivées par défaut)                        #
+    ###########################################################################
+
+    # méthodes remplacées dans l'instance tant que les mesures sont actives
+    _methodes_mesurees = ("create_line", "create_rectangle", "create_oval",
+                          "create_text", "create_image", "delete", "update",
+                          "attend_clic", "_reveille", "attend_clic_async")
+
+    def active_mesures(self, rappel=None):
+        """Active (et remet à zéro) les compteurs de performances.
+
+        Les mesures comptent les objets graphiques créés et supprimés, les
+        appels à update() (donc aussi à refresh()) et leur durée totale, la
+        profondeur maximale de la queue d'événements, et le délai entre
+        l'arrivée de chaque événement et son renvoi par attend_clic (ou
+        attend_clic_async). Voir mesures() pour les lire.
+        Les méthodes mesurées ne sont remplacées dans l'instance que pendant
+        les mesures : désactivées (par défaut), elles ne coûtent rien.
+        Paramètre optionnel :
+        - rappel (fonction): appelée avec ("update", durée) après chaque
+          update(), et avec ("evenement", délai) pour chaque événement
+          renvoyé par attend_clic, en secondes (défaut: None)
+        """
+        assert self.root, "ERREUR : fenêtre fermée !"
+        self.desactive_mesures()
+        compteurs = self.compteurs = {
+            "objets_crees": 0, "objets_supprimes": 0,
+            "updates": 0, "duree_updates": 0.0, "queue_max": 0,
+            "evenements": 0, "delai_evenements": 0.0, "delai_max": 0.0}
+        canevas = self.canevas
+        eventq = self.eventq
+        update = self.update
+        attend_clic = self.attend_clic
+        attend_clic_async = self.attend_clic_async
+        reveille = self._reveille
+
+        def cree(methode):
+            def cree_mesure(*args, **options):
+                compteurs["objets_crees"] += 1
+                return methode(*args, **options)
+            return cree_mesure
+
+        def delete_mesure(*objs):
+            for obj in objs:
+                compteurs["objets_supprimes"] += len(canevas.find_withtag(obj))
+            canevas.delete(*objs)
+
+        def update_mesure():
+            t0 = time.perf_counter()
+            update()
+            duree = time.perf_counter() - t0
+            compteurs["updates"] += 1
+            compteurs["duree_updates"] += duree
+            if rappel is not None:
+                rappel("update", duree)
+
+        def reveille_mesure():
+            compteurs["queue_max"] = max(compteurs["queue_max"],
+                                         eventq.qsize())
+            reveille()
+
+        def mesure_evenement(r):
+            # date d'arrivée gardée par la queue avec l'événement renvoyé,
+            # effacée une fois comptée (attend_clic_async hors écran appelle
+            # attend_clic)
+            if r is not None and eventq.arrivee is not None:
+                delai_evenement = time.perf_counter() - eventq.arrivee
+                eventq.arrivee = None
+                compteurs["evenements"] += 1
+                compteurs["delai_evenements"] += delai_evenement
+                compteurs["delai_max"] = max(compteurs["delai_max"],
+                                             delai_evenement)
+                if rappel is not None:
+                    rappel("evenement", delai_evenement)
+            return r
+
+        def attend_clic_mesure(delai=None):
+            eventq.arrivee = None
+            return mesure_evenement(attend_clic(delai))
+
+        async def attend_clic_async_mesure(delai=None, periode=10):
+            eventq.arrivee = None
+            return mesure_evenement(await attend_clic_async(delai, periode))
+
+        for nom in self._methodes_mesurees[:5]:
+            self.__dict__[nom] = cree(getattr(canevas, nom))
+        self.__dict__["delete"] = delete_mesure
+        self.__dict__["update"] = update_mesure
+        self.__dict__["attend_clic"] = attend_clic_mesure
+        self.__dict__["_reveille"] = reveille_mesure
+        self.__dict__["attend_clic_async"] = attend_clic_async_mesure
+
+    def desactive_mesures(self):
+        """Désactive les compteurs de performances (voir active_mesures)."""
+        for nom in self._methodes_mesurees:
+            self.__dict__.pop(nom, None)
+        self.compteurs = None
+
+    def mesures(self):
+        """Renvoie un instantané des compteurs de performances.
+
+        Précondition : les mesures ont été activées par active_mesures().
+        Renvoie un dictionnaire contenant :
+        - "objets_crees", "objets_supprimes" (int): objets graphiques créés
+          et supprimés
+        - "updates" (int), "duree_updates" (float): nombre d'appels à
+          update() et leur durée totale en secondes
+        - "queue" (int), "queue_max" (int): nombre d'événements dans la
+          queue, et nombre maximal atteint
+        - "evenements" (int), "delai_evenements" (float), "delai_max"
+          (float): nombre d'événements renvoyés par attend_clic (ou
+          attend_clic_async), et délais total et maximal (en secondes)
+          entre leur arrivée et leur renvoi
+        """
+        assert self.compteurs is not None, "ERREUR : mesures non activées !"
+        instantane = dict(self.compteurs)
+        instantane["queue"] = self.eventq.qsize()
+        return instantane
+
+
+###########################################################################
+# file d'événements                                                       #
+###########################################################################
+class _file_evenements:
+    """File bornée des événements d'une fenêtre, qui regroupe les répétitions.
+
+    Remplace queue.Queue (mêmes méthodes put, get, empty et qsize), tous les
+    événements étant produits et lus par le fil d'exécution de tkinter.
+    - taille_max (int): nombre maximal d'événements en attente
+    - oubli (str): quand la file est pleine, "anciens" oublie le plus ancien
+        événement, "nouveaux" oublie le nouvel événement ; ("FIN", None) et
+        l'expiration du délai (None) ne sont jamais oubliés
+    - fusion_touches (bool): une touche identique à l'événement précédent
+        (touche répétée pas encore lue) n'est pas ajoutée
+
+    Les déplacements de souris successifs sont toujours regroupés : seul le
+    dernier est gardé. Les attributs regroupes et oublies comptent les
+    événements regroupés et oubliés.
+    Chaque événement garde sa date d'arrivée (time.perf_counter) : celle du
+    dernier événement renvoyé par get est dans l'attribut arrivee. Un
+    événement regroupé garde la date du premier des événements regroupés.
+    """
+
+    def __init__(self, taille_max=256, oubli="anciens",
+                 fusion_touches=False):
+        import collections
+        assert oubli in ("anciens", "nouveaux"), "ERREUR : oubli doit être \
+'anciens' ou 'nouveaux' !"
+        # couples [événement, date d'arrivée]
+        self.file = collections.deque()
+        self.taille_max = taille_max
+        self.oubli = oubli
+        self.fusion_touches = fusion_touches
+        self.regroupes = 0
+        self.oublies = 0
+        self.arrivee = None
+
+    def put(self, evenement):
+        """Ajoute un événement à la fin de la file."""
+        file = self.file
+        genre = evenement[0] if isinstance(evenement, tuple) else None
+        if file and isinstance(file[-1][0], tuple) \
+                and file[-1][0][0] == genre:
+            if genre == "souris":
+                file[-1][0] = evenement
+                self.regroupes += 1
+                return
+            if genre == "touche" and self.fusion_touches \
+                    and file[-1][0] == evenement:
+                self.regroupes += 1
+                return
+        if len(file) >= self.taille_max:
+            if evenement is not None and genre != "FIN" \
+                    and self.oubli == "nouveaux":
+                self.oublies += 1
+                return
+            for k, (ancien, date) in enumerate(file):
+                if ancien is not None and ancien != ("FIN", None):
+                    del file[k]
+                    self.oublies += 1
+                    break
+        file.append([evenement, time.perf_counter()])
+
+    def get(self, block=True):
+        """Retire et renvoie le premier événement (la file est non vide)."""
+        evenement, self.arrivee = self.file.popleft()
+        return evenement
+
+    def empty(self):
+        """Teste si la file est vide."""
+        return not self.file
+
+    def qsize(self):
+        """Renvoie le nombre d'événements en attente."""
+        return len(self.file)
+
+
+###########################################################################
+# calcul parallèle : fonction exécutée dans les autres processus          #
+###########################################################################
+def _calcule_tuile(fonction, par_tuile, i0, j0, i1, j1):
+    """interne: Calcule les cases [i0,i1[x[j0,j1[ (voir calcule_pixels).
+
+    Renvoie (i0, j0, i1, j1, octets rouge, vert, bleu des cases).
+    """
+    if par_tuile:
+        donnees = bytes(fonction(i0, j0, i1, j1))
+        assert len(donnees) == 3*(i1-i0)*(j1-j0), "ERREUR : la fonction \
+doit renvoyer 3 octets par case de la tuile !"
+    else:
+        donnees = b"".join(_octets_rgb(fonction(i, j))
+                           for i in range(i0, i1) for j in range(j0, j1))
+    return i0, j0, i1, j1, donnees
+
+
+###########################################################################
+# tampon partagé : écriture des images depuis un autre processus          #
+###########################################################################
+# en-tête de la mémoire partagée (voir fenetre.partage_tampon) : numéro de
+# la dernière image publiée, image affichée (0 ou 1), hauteur et largeur,
+# suivis des deux images de 3 octets (rouge, vert, bleu) par case
+_ENTIER_PARTAGE = struct.Struct("<Q")
+_ENTIERS_PARTAGES = struct.Struct("<4Q")
+_DEBUT_PARTAGE = _ENTIERS_PARTAGES.size
+
+
+class producteur:
+    """Dessine dans le tampon d'une fenêtre depuis un autre processus.
+
+    - nom (str): nom de la mémoire partagée, renvoyé par
+        fenetre.partage_tampon() dans le processus de la fenêtre
+
+    Le producteur dessine une image dans l'attribut pixels (memoryview de
+    3 octets rouge, vert, bleu par case, ligne par ligne ; avec NumPy :
+    numpy.frombuffer(p.pixels, dtype=numpy.uint8).reshape(h, l, 3)), puis
+    la publie avec publie(). La fenêtre affiche toujours la dernière image
+    complète publiée, jamais une image en cours de dessin.
+    """
+
+    def __init__(self, nom):
+        """Ouvre la mémoire partagée de nom donné."""
+        from multiprocessing import shared_memory
+        try:
+            self.memoire = shared_memory.SharedMemory(name=nom, track=False)
+        except TypeError:
+            # python < 3.13 : sans cela, la mémoire serait détruite à la fin
+            # de ce processus, alors qu'elle appartient à la fenêtre
+            from multiprocessing import resource_tracker
+            self.memoire = shared_memory.SharedMemory(name=nom)
+            resource_tracker.unregister(self.memoire._name, "shared_memory")
+        self.sequence, self.affichee, h, l = \
+            _ENTIERS_PARTAGES.unpack_from(self.memoire.buf, 0)
+        self.taille = (h, l)
+        n = 3*h*l
+        self.images = (
+            self.memoire.buf[_DEBUT_PARTAGE:_DEBUT_PARTAGE+n],
+            self.memoire.buf[_DEBUT_PARTAGE+n:_DEBUT_PARTAGE+2*n])
+        # on dessine par dessus l'image affichée
+        self.pixels[:] = self.images[self.affichee]
+
+    def __enter__(self):
+        """interne: With -as: statement compatibility."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """interne: With -as: statement compatibility."""
+        self.ferme()
+
+    @property
+    def pixels(self):
+        """Image en cours de dessin (change à chaque publie)."""
+        return self.images[1-self.affichee]
+
+    def colorie_case(self, p, couleur="black"):
+        """Colorie la case p=(l,c) de l'image en cours de dessin."""
+        i, j = p
+        assert 0 <= i < self.taille[0] and 0 <= j < self.taille[1], "ERREUR : \
+coordonnées hors dimension de la fenêtre !"
+        k = 3*(i*self.taille[1]+j)
+        self.pixels[k:k+3] = _octets_rgb(couleur)
+
+    def publie(self, copie=True):
+        """Publie l'image dessinée : la fenêtre l'affichera au refresh().
+
+        Paramètre optionnel :
+        - copie (bool): si True (défaut), l'image publiée est recopiée dans
+          la nouvelle image en cours de dessin, pour continuer à dessiner
+          par dessus ; si False, la nouvelle image contient une ancienne
+          image, et doit être entièrement redessinée
+        """
+        self.affichee = 1 - self.affichee
+        # l'image affichée est changée avant le numéro d'image : la fenêtre
+        # qui voit le nouveau numéro lit aussi la nouvelle image
+        _ENTIER_PARTAGE.pack_into(self.memoire.buf, 8, self.affichee)
+        self.sequence += 1
+        _ENTIER_PARTAGE.pack_into(self.memoire.buf, 0, self.sequence)
+        if copie:
+            self.pixels[:] = self.images[self.affichee]
+
+    def ferme(self):
+        """Ferme la mémoire partagée dans ce processus.
+
+        Les tableaux NumPy construits sur pixels doivent avoir été supprimés.
+        """
+        if self.memoire is not None:
+            for image in self.images:
+                image.release()
+            self.memoire.close()
+            self.memoire = None
+
+
+###########################################################################
+# grille virtuelle : grande grille de cases, vue à travers une fenêtre    #
+###########################################################################
+class grille_virtuelle:
+    """Grille de cases colorées, affichable par morceaux dans une fenêtre.
+
+    - taille ((int, int)): un couple (hauteur, largeur) qui donne la taille
+        de la grille, qui peut être bien plus grande que l'écran
+    - fond (str): couleur des cases jamais coloriées (défaut: la couleur de
+        fond des fenêtres)
+
+    Les cases sont rangées par tuiles de cote_tuile x cote_tuile cases,
+    créées seulement quand une de leurs cases est coloriée : la mémoire
+    utilisée dépend de la partie dessinée, pas de la taille de la grille.
+    Pour les vues zoomées (voir fenetre.affiche_grille), chaque tuile du
+    niveau n est réduite d'un facteur 2 à partir des quatre tuiles du niveau
+    n-1 ; elle est gardée en cache jusqu'à ce qu'une de ses cases change.
+    Chaque case réduite prend la couleur de la première case coloriée (qui
+    n'est pas du fond) de son carré de 2 x 2 cases : même une case isolée
+    reste visible à tous les niveaux.
+    """
+
+    # côté (en cases) des tuiles
+    cote_tuile = 256
+
+    def __init__(self, taille, fond=None):
+        """Crée une grille dont aucune case n'est coloriée."""
+        self.taille = taille
+        self.fond = fenetre.couleur_fond if fond is None else fond
+        # tuiles du niveau 0 : (ti, tj) -> octets (rouge, vert, bleu) des
+        # cases, et tuiles réduites : (niveau, ti, tj) -> octets, ou None si
+        # aucune case n'est coloriée
+        self.tuiles = {}
+        self.reductions = {}
+        # augmente à chaque modification (voir fenetre.refresh)
+        self.version = 0
+
+    def colorie_case(self, p, couleur="black"):
+        """Colorie la case p=(l,c) de la grille."""
+        i, j = p
+        assert 0 <= i < self.taille[0] and 0 <= j < self.taille[1], "ERREUR : \
+coordonnées hors dimension de la grille !"
+        t = self.cote_tuile
+        k = 3*((i % t)*t + j % t)
+        self._tuile_modifiee(i//t, j//t)[k:k+3] = _octets_rgb(couleur)
+        self.version += 1
+
+    def remplit_rectangle(self, p1, p2, couleur="black"):
+        """Colorie le rectangle de coins opposés p1 et p2 (inclus)."""
+        i0, i1 = sorted((p1[0], p2[0]))
+        j0, j1 = sorted((p1[1], p2[1]))
+        assert 0 <= i0 and i1 < self.taille[0] and 0 <= j0 \
+            and j1 < self.taille[1], "ERREUR : coordonnées hors dimension \
+de la grille !"
+        t = self.cote_tuile
+        c = _octets_rgb(couleur)
+        for ti in range(i0//t, i1//t + 1):
+            for tj in range(j0//t, j1//t + 1):
+                tuile = self._tuile_modifiee(ti, tj)
+                b0, b1 = max(j0 - tj*t, 0), min(j1 - tj*t, t-1)
+                ligne = c*(b1-b0+1)
+                for a in range(max(i0 - ti*t, 0), min(i1 - ti*t, t-1) + 1):
+                    tuile[3*(a*t+b0):3*(a*t+b1+1)] = ligne
+        self.version += 1
+
+    def couleur_case(self, p):
+        """Renvoie la couleur de la case p=(l,c), en entier 0xRRGGBB."""
+        t = self.cote_tuile
+        tuile = self.tuiles.get((p[0]//t, p[1]//t))
+        if tuile is None:
+            return couleur_rgb(self.fond)
+        k = 3*((p[0] % t)*t + p[1] % t)
+        return int.from_bytes(tuile[k:k+3], "big")
+
+    def _tuile_modifiee(self, ti, tj):
+        """interne: Tuile (ti, tj) à modifier, sans ses réductions."""
+        tuile = self.tuiles.get((ti, tj))
+        if tuile is None:
+            tuile = self.tuiles[ti, tj] = bytearray(
+                _octets_rgb(self.fond) * (self.cote_tuile**2))
+        # une réduction n'est calculée qu'après celles qu'elle réduit : on
+        # peut s'arrêter à la première absente
+        n = 1
+        while self.reductions.pop((n, ti >> n, tj >> n), 0) != 0:
+            n += 1
+        return tuile
+
+    def _tuile(self, niveau, ti, tj):
+        """interne: Tuile (ti, tj) du niveau donné, ou None si vide."""
+        if niveau == 0:
+            return self.tuiles.get((ti, tj))
+        cle = (niveau, ti, tj)
+        if cle in self.reductions:
+            return self.reductions[cle]
+        t = self.cote_tuile
+        m = t // 2
+        fond = _octets_rgb(self.fond)
+        ligne_fond = fond*t
+        tuile = None
+        for a in (0, 1):
+            for b in (0, 1):
+                source = self._tuile(niveau-1, 2*ti+a, 2*tj+b)
+                if source is None:
+                    continue
+                if tuile is None:
+                    tuile = bytearray(fond * (t*t))
+                for r in range(m):
+                    haut = source[6*r*t:6*r*t+3*t]
+                    bas = source[6*r*t+3*t:6*r*t+6*t]
+                    if haut == ligne_fond and bas == ligne_fond:
+                        continue
+                    # case en haut à gauche de chaque carré de 2 x 2 cases
+                    k = 3*((a*m+r)*t + b*m)
+                    tuile[k:k+3*m:3] = haut[0::6]
+                    tuile[k+1:k+3*m:3] = haut[1::6]
+                    tuile[k+2:k+3*m:3] = haut[2::6]
+                    # si c'est du fond : une autre case coloriée du carré
+                    for c in range(0, 6*m, 6):
+                        if tuile[k:k+3] == fond:
+                            for case in (haut[c+3:c+6], bas[c:c+3],
+                                         bas[c+3:c+6]):
+                                if case != fond:
+                                    tuile[k:k+3] = case
+                                    break
+                        k += 3
+        self.reductions[cle] = tuile
+        return tuile
+
+
+###########################################################################
+# fenêtres hors écran : canvas et images en mémoire, export PNG           #
+###########################################################################
+def _agrandit(tampon, taille, pixels):
+    """interne: Agrandit un tampon de taille (h, l) d'un facteur pixels.
+
+    Chaque case du tampon (3 octets) devient un carré de pixels*pixels.
+    """
+    h, l = taille
+    if pixels == 1:
+        return tampon
+    grand = bytearray(3*h*l*pixels*pixels)
+    largeur = 3*l*pixels
+    ligne = bytearray(largeur)
+    for i in range(h):
+        source = tampon[3*i*l:3*(i+1)*l]
+        # recopie chaque composante pixels fois sur la ligne agrandie
+        for r in range(pixels):
+            for c in range(3):
+                ligne[3*r+c::3*pixels] = source[c::3]
+        debut = i*pixels*largeur
+        grand[debut:debut+pixels*largeur] = ligne*pixels
+    return grand
+
+
+def _bloc_png(genre, donnees):
+    """interne: Bloc (chunk) PNG : longueur, type, données et CRC."""
+    return struct.pack(">I", len(donnees)) + genre + donnees \
+        + struct.pack(">I", zlib.crc32(genre + donnees))
+
+
+def _entete_png(largeur, hauteur):
+    """interne: Signature et bloc IHDR d'une image PNG RGB 8 bits."""
+    return b"\x89PNG\r\n\x1a\n" + _bloc_png(
+        b"IHDR", struct.pack(">IIBBBBB", largeur, hauteur, 8, 2, 0, 0, 0))
+
+
+def _compresse_png(largeur, pixels):
+    """interne: Données compressées (IDAT) d'une image RGB."""
+    n = 3*largeur
+    # chaque ligne est précédée de son filtre (0 : aucun)
+    lignes = b"".join(b"\x00" + pixels[k:k+n]
+                      for k in range(0, len(pixels), n))
+    return zlib.compress(lignes, 1)
+
+
+def _code_png(largeur, hauteur, pixels):
+    """interne: Code une image RGB (3 octets par pixel) au format PNG."""
+    return _entete_png(largeur, hauteur) \
+        + _bloc_png(b"IDAT", _compresse_png(largeur, pixels)) \
+        + _bloc_png(b"IEND", b"")
+
+
+class _enregistreur:
+    """interne: Écrit les images successives d'une fenêtre dans un fichier.
+
+    Au format PPM, les images sont simplement écrites les unes après les
+    autres. Au format PNG (animation APNG), chaque image n'est écrite
+    qu'à l'arrivée de la suivante, quand sa durée est connue, et seules
+    les lignes qui ont changé sont enregistrées. Le nombre d'images est
+    écrit dans l'en-tête à la fin.
+    Seules la dernière image et l'image en attente sont gardées en mémoire.
+    """
+
+    def __init__(self, nom_fichier, largeur, hauteur, ips):
+        self.apng = nom_fichier.lower().endswith(".png")
+        assert self.apng or nom_fichier.lower().endswith(".ppm"), "ERREUR : \
+le nom du fichier doit se terminer par .png ou .ppm !"
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.ips = ips
+        self.fichier = open(nom_fichier, "wb")
+        self.derniere = None
+        # APNG : image en attente (première ligne, nombre de lignes, données
+        # compressées) et nombre d'images qu'elle dure
+        self.attente = None
+        self.duree = 0
+        self.nb_images = 0
+        self.sequence = 0
+        if self.apng:
+            self.fichier.write(_entete_png(largeur, hauteur))
+            # bloc acTL (nombre d'images, nombre de répétitions), complété
+            # à la fin de l'enregistrement
+            self.position_actl = self.fichier.tell()
+            self.fichier.write(_bloc_png(b"acTL", struct.pack(">II", 0, 0)))
+
+    def ajoute(self, pixels):
+        """Ajoute une image (3 octets par pixel, ligne par ligne)."""
+        if pixels == self.derniere:
+            # image identique à la précédente : elle dure plus longtemps
+            self.duree += 1
+            return
+        if not self.apng:
+            self.fichier.write(b"P6 %d %d 255\n" % (self.largeur,
+                                                    self.hauteur) + pixels)
+        else:
+            self._ecrit_attente()
+            # seules les lignes de debut à fin-1 ont changé
+            n = 3*self.largeur
+            debut, fin = 0, self.hauteur
+            if self.derniere is not None:
+                while pixels[debut*n:(debut+1)*n] \
+                        == self.derniere[debut*n:(debut+1)*n]:
+                    debut += 1
+                while pixels[(fin-1)*n:fin*n] \
+                        == self.derniere[(fin-1)*n:fin*n]:
+                    fin -= 1
+            self.attente = (debut, fin-debut, _compresse_png(
+                self.largeur, pixels[debut*n:fin*n]))
+        self.derniere = pixels
+        self.duree = 1
+
+    def _ecrit_attente(self):
+        """Écrit l'image en attente de l'animation APNG, avec sa durée."""
+        if self.attente is None:
+            return
+        debut, hauteur, donnees = self.attente
+        # bloc fcTL : numéro, taille, position, durée duree/ips, pas
+        # d'effacement (0) et remplacement des pixels (0)
+        self.fichier.write(_bloc_png(b"fcTL", struct.pack(
+            ">IIIIIHHBB", self.sequence, self.largeur, hauteur, 0, debut,
+            min(self.duree, 0xFFFF), self.ips, 0, 0)))
+        self.sequence += 1
+        if self.nb_images == 0:
+            self.fichier.write(_bloc_png(b"IDAT", donnees))
+        else:
+            self.fichier.write(_bloc_png(
+                b"fdAT", struct.pack(">I", self.sequence) + donnees))
+            self.sequence += 1
+        self.nb_images += 1
+        self.attente = None
+
+    def ferme(self):
+        """Termine le fichier."""
+        if self.apng:
+            self._ecrit_attente()
+            self.fichier.write(_bloc_png(b"IEND", b""))
+            self.fichier.seek(self.position_actl)
+            self.fichier.write(_bloc_png(
+                b"acTL", struct.pack(">II", self.nb_images, 0)))
+        self.fichier.close()
+
+
+def _tags(tags):
+    """interne: Liste des tags d'un objet (donnés comme pour tkinter)."""
+    return tags.split() if isinstance(tags, str) else tags
+
+
+class _image_tampon:
+    """interne: Image d'un tampon de pixels, affichée par _canevas_memoire."""
+
+    def __init__(self, tampon, taille, pixels):
+        self.tampon = tampon
+        self.taille = taille
+        self.pixels = pixels
+
+
+class _canevas_memoire:
+    """interne: Canvas en mémoire, pour les fenêtres hors écran.
+
+    Fournit les méthodes de canvas tkinter utilisées par fenetre. Les objets
+    graphiques sont gardés dans un dictionnaire (dans l'ordre d'affichage),
+    et ne sont dessinés qu'à la demande par rendu(). Les textes sont
+    conservés mais ne sont pas dessinés.
+    """
+
+    def __init__(self, hauteur, largeur, fond):
+        self.hauteur = hauteur
+        self.largeur = largeur
+        self.fond = fond
+        # identifiant -> [type, coordonnées, options]
+        self.objets = {}
+        self.dernier = 0
+
+    def _cree(self, genre, coords, options):
+        if len(coords) == 1:
+            coords = coords[0]
+        self.dernier += 1
+        self.objets[self.dernier] = [genre, [float(c) for c in coords],
+                                     options]
+        return self.dernier
+
+    def create_line(self, *coords, **options):
+        return self._cree("line", coords, options)
+
+    def create_rectangle(self, *coords, **options):
+        return self._cree("rectangle", coords, options)
+
+    def create_oval(self, *coords, **options):
+        return self._cree("oval", coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._cree("text", coords, options)
+
+    def create_image(self, *coords, **options):
+        return self._cree("image", coords, options)
+
+    def _trouve(self, obj):
+        """Identifiants des objets désignés par obj (identifiant ou tag)."""
+        if obj == "all":
+            return list(self.objets)
+        if isinstance(obj, str):
+            return [k for k, (genre, coords, options) in self.objets.items()
+                    if obj in _tags(options.get("tags", ()))]
+        return [obj] if obj in self.objets else []
+
+    def delete(self, *objs):
+        for obj in objs:
+            for k in self._trouve(obj):
+                del self.objets[k]
+
+    def coords(self, obj, *coords):
+        if not coords:
+            return list(self.objets[obj][1])
+        if len(coords) == 1:
+            coords = coords[0]
+        self.objets[obj][1] = [float(c) for c in coords]
+
+    def itemconfigure(self, obj, **options):
+        self.objets[obj][2].update(options)
+
+    itemconfig = itemconfigure
+
+    def itemcget(self, obj, option):
+        return self.objets[obj][2].get(option, "")
+
+    def type(self, obj):
+        return self.objets[obj][0] if obj in self.objets else None
+
+    def find_all(self):
+        return tuple(self.objets)
+
+    def find_withtag(self, obj):
+        return tuple(self._trouve(obj))
+
+    def tag_raise(self, obj, dessus=None):
+        self._deplace(obj, dessus, 1)
+
+    def tag_lower(self, obj, dessous=None):
+        self._deplace(obj, dessous, 0)
+
+    def _deplace(self, obj, voisin, apres):
+        """Place obj juste avant (apres=0) ou juste après (apres=1) voisin,
+        ou tout au début / à la fin si voisin est None."""
+        if voisin is None and apres:
+            # cas courant (_recycle) : mettre à la fin du dictionnaire
+            for k in self._trouve(obj):
+                self.objets[k] = self.objets.pop(k)
+            return
+        deplaces = [(k, self.objets.pop(k)) for k in self._trouve(obj)]
+        ordre = list(self.objets.items())
+        voisins = [] if voisin is None else self._trouve(voisin)
+        if not voisins:
+            k = len(ordre) if apres else 0
+        else:
+            k = list(self.objets).index(voisins[0]) + apres
+        ordre[k:k] = deplaces
+        self.objets = dict(ordre)
+
+    def update(self):
+        pass
+
+    def bind(self, *args):
+        pass
+
+    def destroy(self):
+        pass
+
+    ###########################################################################
+    # dessin des objets dans un tampon de pixels                              #
+    ###########################################################################
+    def rendu(self):
+        """Dessine tous les objets, et renvoie les pixels de l'image.
+
+        Le résultat contient 3 octets (rouge, vert, bleu) par pixel, ligne
+        par ligne. Les coordonnées des objets sont décalées d'un pixel,
+        comme pour le canvas tkinter (qui a un bord d'un pixel).
+        """
+        pixels = bytearray(_octets_rgb(self.fond)
+                           * (self.hauteur*self.largeur))
+        for genre, coords, options in self.objets.values():
+            if options.get("state") != "hidden":
+                getattr(self, "_dessine_" + genre)(pixels, coords, options)
+        return pixels
+
+    def _segment(self, pixels, y, x0, x1, rgb):
+        """Colorie les pixels x0 <= x < x1 de la ligne y."""
+        if 0 <= y < self.hauteur:
+            x0 = max(x0, 0)
+            x1 = min(x1, self.largeur)
+            if x0 < x1:
+                k = 3*(y*self.largeur)
+                pixels[k+3*x0:k+3*x1] = rgb*(x1-x0)
+
+    def _dessine_rectangle(self, pixels, coords, options):
+        # le rectangle contient ses quatre bords
+        x0, y0, x1, y1 = (round(c)-1 for c in coords[:4])
+        x0, x1 = min(x0, x1), max(x0, x1)+1
+        y0, y1 = min(y0, y1), max(y0, y1)+1
+        fond = options.get("fill", "")
+        if fond != "":
+            rgb = _octets_rgb(fond)
+            for y in range(y0, y1):
+                self._segment(pixels, y, x0, x1, rgb)
+        e = round(float(options.get("width", 1)))
+        contour = options.get("outline", "black")
+        if e > 0 and contour != "":
+            rgb = _octets_rgb(contour)
+            for y in range(y0, y1):
+                if y < y0+e or y >= y1-e:
+                    self._segment(pixels, y, x0, x1, rgb)
+                else:
+                    self._segment(pixels, y, x0, x0+e, rgb)
+                    self._segment(pixels, y, x1-e, x1, rgb)
+
+    def _ellipse(self, pixels, x0, y0, x1, y1, rgb):
+        """Remplit l'ellipse inscrite dans le rectangle [x0,x1[x[y0,y1[."""
+        cx, cy = (x0+x1)/2, (y0+y1)/2
+        rx, ry = (x1-x0)/2, (y1-y0)/2
+        if rx <= 0 or ry <= 0:
+            return
+        for y in range(int(y0), int(y1)+1):
+            dy = (y+0.5-cy)/ry
+            if dy*dy < 1:
+                d = rx*(1-dy*dy)**0.5
+                self._segment(pixels, y, round(cx-d), round(cx+d), rgb)
+
+    def _dessine_oval(self, pixels, coords, options):
+        x0, y0, x1, y1 = (c-1 for c in coords[:4])
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        e = float(options.get("width", 1))
+        contour = options.get("outline", "black")
+        fond = options.get("fill", "")
+        if e > 0 and contour != "":
+            # le contour est une ellipse pleine, recouverte par l'intérieur
+            self._ellipse(pixels, x0, y0, x1, y1, _octets_rgb(contour))
+            if fond != "":
+                self._ellipse(pixels, x0+e, y0+e, x1-e, y1-e,
+                              _octets_rgb(fond))
+        elif fond != "":
+            self._ellipse(pixels, x0, y0, x1, y1, _octets_rgb(fond))
+
+    def _dessine_line(self, pixels, coords, options):
+        couleur = options.get("fill", "black")
+        if couleur == "":
+            return
+        rgb = _octets_rgb(couleur)
+        e = max(1, round(float(options.get("width", 1))))
+        points = [round(c)-1 for c in coords]
+        for k in range(0, len(points)-3, 2):
+            # algorithme de Bresenham, un carré de côté e par point
+            x, y, x1, y1 = points[k:k+4]
+            dx, dy = abs(x1-x), -abs(y1-y)
+            sx, sy = (1 if x < x1 else -1), (1 if y < y1 else -1)
+            err = dx+dy
+            while True:
+                for yy in range(y-e//2, y-e//2+e):
+                    self._segment(pixels, yy, x-e//2, x-e//2+e, rgb)
+                if x == x1 and y == y1:
+                    break
+                e2 = 2*err
+                if e2 >= dy:
+                    err += dy
+                    x += sx
+                if e2 <= dx:
+                    err += dx
+                    y += sy
+
+    def _dessine_text(self, pixels, coords, options):
+        # pas de police de caractères en mémoire : les textes sont ignorés
+        pass
+
+    def _dessine_image(self, pixels, coords, options):
+        image = options["image"]
+        x0, y0 = round(coords[0])-1, round(coords[1])-1
+        h = image.taille[0]*image.pixels
+        l = image.taille[1]*image.pixels
+        source = _agrandit(image.tampon, image.taille, image.pixels)
+        # partie de l'image qui est dans le canvas
+        debut, fin = max(0, -x0), min(l, self.largeur-x0)
+        if debut >= fin:
+            return
+        for y in range(max(0, -y0), min(h, self.hauteur-y0)):
+            k = 3*((y0+y)*self.largeur + x0)
+            pixels[k+3*debut:k+3*fin] = source[3*(y*l+debut):3*(y*l+fin)]
 
 
 ###########################################################################
@@ -675,27 +3733,24 @@ if __name__ == "__main__":
                           "Bonjour!")
 
     # boucle principale : attend les clics utilisateur et affiche des pions.
-    # leurs identifiants sont stockés dans tab, et ils sont supprimés si
-    # on reclique dessus.
-    tab = [[None]*COTE for i in range(COTE)]
+    # la fenêtre retient le pion de chaque case (objet_case), et il est
+    # supprimé si on reclique dessus.
     joueur = 1
     while True:
         p = g.attend_clic()
         if p[0] != "clic":
             # si l'utilisateur ne clique pas sur une case je quitte
             break
-        lig, col = p[1]
-        if tab[lig][col] is None:
-            tab[lig][col] = g.affiche_pion(p[1], joueur)
+        pion = g.objet_case(p[1])
+        if pion is None:
+            g.affiche_pion(p[1], joueur)
             # joueur : 1 -> -1 -> 1 -> ...
             joueur = -joueur
         else:
-            g.supprime(tab[lig][col])
-            tab[lig][col] = None
+            g.supprime(pion)
 
-        g.supprime(msg)
-        msg = g.affiche_texte((LARGEUR//2, LARGEUR+LARGEUR//2),
-                              "Joueur "+[0, "blanc", "noir"][joueur])
+        # le message est modifié sur place, sans être recréé
+        g.modifie_texte(msg, "Joueur "+[0, "blanc", "noir"][joueur])
 
     # ferme la fenêtre
     g.ferme()
@@ -1,57 +1,195 @@
+import functools
+import io
+import os
+import sys
+
+import graph
+
 #Question 1.1;
 def a_la_chaine(n):
     """Retourne une chaîne de caractères composé d'une juxtaposition de n caractères A"""
-    sapin = ""
-    for i in range(n):
-        sapin = "A" * (n)
-    return sapin
+    return lignes("ligne", n)[0]
 #print(a_la_chaine(13))
 
 #Question 1.2;
 def a_la_chaine2(esp,n):
     """Retourne une chaîne de caractères composé d'espaces suivis de n caractères A"""
-    sapin = ""
-    for i in range(n):
-        sapin = " " * (esp) + "A" * (n)
-    return sapin
+    if n <= 0:
+        return ""
+    return _tampon(esp, n)
 
 #Question 1.3;
 def colonne(n):
     """Retourne None et Affiche 10 fois une chaîne de caractères composé de n fois  A"""
-    sapin = ""
-    i = 0
-    for i in range(10):
-        sapin = "A" * (n)
-        print(sapin)
+    ecrit("colonne", n)
     return None
 
 #Question 1.4;
 def diagonale1(n):
     """"Retourne n lignes, la première ligne devra contenir 1 caractère A et la deuxième ligne devra contenir 2 caractères A, et ainsi de suite jusqu'à n lignes"""
-    sapin = ""
-    for i in range(n):
-        sapin = "A" * (i+1)
-        print(sapin)
-    return sapin
+    return ecrit("diagonale1", n)
 ##print(diagonale1(5))
 
 #Question 1.5;
 def diagonale2(n):
     """Retourne n lignes, sur la première ligne il doit y avoir des espaces et un caractère 'A' en dernière position, sur la deuxième ligne il doit y avoir des espaces et deux caractères 'A' en dernière position"""
-    sapin = ""
-    for i in range(n):
-        sapin = " " * (n-i) + "A" * (i+1)
-        print(sapin)
-    return sapin
+    return ecrit("diagonale2", n)
 #print(diagonale2(5))
 
 #Question 1.6;
 def sapin(n):
     """"Retourne n lignes, la première ligne doit contenir un caractère 'A', La deuxième devra en contenir 3 et ainsi de suite jusqu'à ce qu n lignes soit écritent.
         Le programme retourne trois caractères 'A' qui feront office de tronc pour le sapin"""
-    hello = ""
-    for i in range(n):
-        hello = " " * (n-i) + "A" * (i*2+1)
-        print(hello)
-    return hello
-#print(sapin(5))
\ No newline at end of file
+    return ecrit("sapin", n)
+#print(sapin(5))
+
+#Moteur de formes;
+def _tampon(esp, n):
+    """Retourne le tampon dans lequel sont découpées les lignes d'une forme : esp espaces suivis de n caractères A"""
+    return " " * esp + "A" * n
+
+def _dimensions(forme, n, tronc=False):
+    """Génère, pour chaque ligne d'une forme de taille n (voir genere), le couple (e, a) : la ligne est composée de e espaces suivis de a caractères A"""
+    if forme == "ligne":
+        yield 0, n
+    elif forme == "colonne":
+        for i in range(10):
+            yield 0, n
+    elif forme == "diagonale1":
+        for i in range(n):
+            yield 0, i+1
+    elif forme == "diagonale2":
+        for i in range(n):
+            yield n-i, i+1
+    else:
+        assert forme == "sapin", "forme inconnue : " + forme
+        for i in range(n):
+            yield n-i, 2*i+1
+        if tronc:
+            yield n-1, 3
+
+def genere(forme, n, tronc=False):
+    """Génère une à une les lignes d'une forme de taille n : "ligne" (Question 1.1), "colonne" (1.3), "diagonale1" (1.4), "diagonale2" (1.5) ou "sapin" (1.6).
+        Toutes les lignes sont découpées dans un seul tampon, une ligne de e espaces suivis de a caractères A étant tampon[n-e:n+a] : le travail total est proportionnel à la taille du résultat, et la mémoire utilisée à la taille d'une ligne.
+        Avec tronc=True, le sapin est suivi de son tronc de trois caractères 'A'"""
+    tampon = _tampon(n, max(2*n-1, 3))
+    for e, a in _dimensions(forme, n, tronc):
+        yield tampon[n-e:n+a]
+
+def lignes(forme, n, tronc=False):
+    """Retourne la liste des lignes d'une forme de taille n (voir genere)"""
+    return list(genere(forme, n, tronc))
+#print("\n".join(lignes("sapin", 5, tronc=True)))
+
+def ecrit(forme, n, fichier=None, tronc=False, taille_bloc=1 << 16):
+    """Écrit les lignes d'une forme de taille n (voir genere), chacune suivie d'un retour à la ligne, et retourne la dernière ligne écrite ("" si aucune).
+        fichier peut être un fichier texte (par défaut sys.stdout), un fichier binaire ou un descripteur de fichier (entier). Les lignes sont regroupées en blocs d'environ taille_bloc caractères, écrits en une seule fois : le nombre d'écritures reste petit et la mémoire utilisée ne dépend pas du nombre de lignes.
+        La sortie standard (sys.stdout ou sys.stderr), si son encodage écrit les caractères ASCII tels quels, est vidée puis contournée : les lignes sont alors écrites sans copie dans son fichier binaire. Les autres fichiers texte reçoivent des chaînes, pour respecter leur encodage et leur traduction des retours à la ligne.
+        Dans un fichier binaire, les lignes sont des vues (voir ligne_memoire) : les formes de taille au plus TAILLE_MAX_FORME_CACHEE sont prises dans le cache des formes (voir forme_memoire), les plus grandes sont produites ligne par ligne sans être conservées"""
+    if fichier is None:
+        fichier = sys.stdout
+    if _contournable(fichier):
+        fichier.flush()
+        fichier = fichier.buffer
+    if isinstance(fichier, io.TextIOBase):
+        rangs, fin = genere(forme, n, tronc), "\n"
+        def envoie(bloc):
+            fichier.write("".join(bloc))
+    else:
+        if n <= TAILLE_MAX_FORME_CACHEE:
+            rangs = forme_memoire(forme, n, tronc)
+        else:
+            rangs = (_ligne_memoire(e, a) for e, a in _dimensions(forme, n, tronc))
+        fin = b"\n"
+        if isinstance(fichier, int):
+            def envoie(bloc):
+                donnees = memoryview(b"".join(bloc))
+                while donnees:
+                    donnees = donnees[os.write(fichier, donnees):]
+        else:
+            envoie = fichier.writelines
+    derniere = ""
+    bloc = []
+    taille = 0
+    for derniere in rangs:
+        bloc.append(derniere)
+        bloc.append(fin)
+        taille += len(derniere) + 1
+        if taille >= taille_bloc:
+            envoie(bloc)
+            bloc = []
+            taille = 0
+    if bloc:
+        envoie(bloc)
+    if isinstance(derniere, memoryview):
+        return str(derniere, "ascii")
+    return derniere
+#ecrit("sapin", 5, tronc=True)
+
+def _contournable(fichier):
+    """Teste si les lignes destinées au fichier texte peuvent être écrites directement dans son fichier binaire : seulement pour la sortie standard, dont on connait la traduction des retours à la ligne (aucune hors Windows), et si son encodage écrit l'ASCII tel quel"""
+    if fichier not in (sys.stdout, sys.stderr) or os.linesep != "\n":
+        return False
+    if not isinstance(fichier, io.TextIOWrapper):
+        return False
+    try:
+        return " A\n".encode(fichier.encoding) == b" A\n"
+    except (LookupError, TypeError):
+        return False
+
+#Cache des lignes et des formes;
+TAILLE_CACHE_LIGNES = 4096
+TAILLE_CACHE_FORMES = 64
+TAILLE_MAX_FORME_CACHEE = 256
+
+_bande = memoryview(b"")
+_milieu = 0
+
+def _ligne_memoire(e, a):
+    """Retourne, sans copie, une vue sur e espaces suivis de a caractères A, découpée dans la bande partagée par toutes les lignes (agrandie si nécessaire)"""
+    global _bande, _milieu
+    if e > _milieu or a > len(_bande) - _milieu:
+        m = max(e, a, 2 * _milieu, 64)
+        _bande = memoryview(b" " * m + b"A" * m)
+        _milieu = m
+    return _bande[_milieu-e:_milieu+a]
+
+def _forme_memoire(forme, n, tronc=False):
+    """Retourne le tuple des lignes d'une forme de taille n (voir genere), sous forme de vues prises dans le cache des lignes"""
+    return tuple(ligne_memoire(e, a) for e, a in _dimensions(forme, n, tronc))
+
+def dimensionne_cache(lignes=TAILLE_CACHE_LIGNES, formes=TAILLE_CACHE_FORMES):
+    """Vide le cache et fixe le nombre maximal de lignes et de formes qu'il conserve (les moins récemment utilisées sont oubliées en premier)"""
+    global ligne_memoire, forme_memoire
+    ligne_memoire = functools.lru_cache(maxsize=lignes)(_ligne_memoire)
+    forme_memoire = functools.lru_cache(maxsize=formes)(_forme_memoire)
+
+def statistiques_cache():
+    """Retourne, pour le cache des lignes ("lignes") et celui des formes ("formes"), un dictionnaire du nombre de succès ("succes"), d'échecs ("echecs"), d'entrées ("taille") et du maximum d'entrées ("max")"""
+    statistiques = {}
+    for nom, cache in (("lignes", ligne_memoire), ("formes", forme_memoire)):
+        info = cache.cache_info()
+        statistiques[nom] = {"succes": info.hits, "echecs": info.misses,
+                             "taille": info.currsize, "max": info.maxsize}
+    return statistiques
+
+dimensionne_cache()
+#print(bytes(forme_memoire("sapin", 5)[2]), statistiques_cache())
+
+#Affichage dans une fenêtre graph;
+def segments(forme, n, ligne=0, colonne=0, tronc=False):
+    """Génère les segments (ligne, colonne, longueur) des caractères A d'une forme de taille n (voir genere) dont le coin haut gauche est placé en (ligne, colonne) : un segment par ligne de la forme, au lieu d'un point par caractère A"""
+    for i, (e, a) in enumerate(_dimensions(forme, n, tronc)):
+        if a > 0:
+            yield ligne+i, colonne+e, a
+
+def dessine(forme, n, ligne=0, colonne=0, couleur="black", tronc=False):
+    """Dessine une forme de taille n (voir genere) dans la fenêtre de graph, le coin haut gauche en (ligne, colonne), avec plot_segments puis un seul refresh.
+        Si aucune fenêtre n'est ouverte, une fenêtre juste assez grande pour la forme est ouverte"""
+    if graph.fengra is None:
+        dimensions = list(_dimensions(forme, n, tronc))
+        graph.ouvre_fenetre(ligne + max(len(dimensions), 1),
+                            colonne + max([e+a for e, a in dimensions] + [1]))
+    graph.plot_segments(segments(forme, n, ligne, colonne, tronc), couleur)
+    graph.refresh()
+#dessine("sapin", 200, tronc=True); graph.attend_fenetre()
\ No newline at end of file